@@ -0,0 +1,28 @@
+"""Add processed_stat deleted marker
+
+Revision ID: 3f8a1c6d2b94
+Revises: 9d4b7e2a6c15
+Create Date: 2026-10-20 10:12:43.207581
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "3f8a1c6d2b94"
+down_revision = "9d4b7e2a6c15"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "processed_stat",
+        sa.Column("deleted", sa.Boolean(), server_default=sa.false(), nullable=False),
+        schema="youtube",
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("processed_stat", "deleted", schema="youtube")
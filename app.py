@@ -3,8 +3,8 @@ from dash import Dash, Input, Output, callback, dcc, html
 from flask import request, redirect
 import dash_mantine_components as dmc
 
-from data import crud
-from webapp.dashboard import pages, content
+from data.database import query_counter
+from webapp.dashboard import content, data, pages
 import config
 
 import log
@@ -92,69 +92,86 @@ def before_request():
 
 
 date_format = "%Y-%m-%d %H:%M:%S %Z%z"
-date_pulled = crud.collection_event.get_most_recent_collection_event().pull_datetime
-
 tz = pytz.timezone("America/New_York")
-dt_est = date_pulled.astimezone(tz)
-
-footer_notes = [
-    f"All data is current as of {dt_est:{date_format}}",
-    "Content is pulled daily at 3:30PM PST, 6:30PM EST.",
-]
-
-footer = []
-for note in footer_notes:
-    footer.append(html.Em(note))
-    footer.append(html.Br())
-footer.append(
-    html.Img(
-        src=app.get_asset_url("egg.png"),
-        height="60px",
-    )
-)
 
-app_content = html.Div(
-    [
-        d_url := dcc.Location(id="url"),
-        content.header.make_navbar(logo_url=app.get_asset_url("egg.png")),
-        div_page_content := dmc.Container(
-            style={"margin-top": "90px"},
-            px="xs",
-            size="xl",
-        ),
-        html.Div(
-            footer,
-            style={"textAlign": "center", "padding": "25px"},
-        ),
-    ],
-)
-app.layout = dmc.MantineProvider(
-    theme={
-        "colorScheme": "dark",
-        "fontFamily": "'Inter', sans-serif",
-    },
-    children=[app_content],
-    withGlobalStyles=True,
-    withNormalizeCSS=True,
+d_url = dcc.Location(id="url")
+navbar = content.header.make_navbar(logo_url=app.get_asset_url("egg.png"))
+div_page_content = dmc.Container(
+    style={"margin-top": "90px"},
+    px="xs",
+    size="xl",
 )
 
 
+def make_footer():
+    dt_est = data.current().pull_datetime.astimezone(tz)
+
+    footer_notes = [
+        f"All data is current as of {dt_est:{date_format}}",
+        "Content is pulled daily at 3:30PM PST, 6:30PM EST.",
+    ]
+
+    footer = []
+    for note in footer_notes:
+        footer.append(html.Em(note))
+        footer.append(html.Br())
+    footer.append(
+        html.Img(
+            src=app.get_asset_url("egg.png"),
+            height="60px",
+        )
+    )
+
+    return footer
+
+
+def serve_layout():
+    app_content = html.Div(
+        [
+            d_url,
+            navbar,
+            div_page_content,
+            html.Div(
+                make_footer(),
+                style={"textAlign": "center", "padding": "25px"},
+            ),
+        ],
+    )
+    return dmc.MantineProvider(
+        theme={
+            "colorScheme": "dark",
+            "fontFamily": "'Inter', sans-serif",
+        },
+        children=[app_content],
+        withGlobalStyles=True,
+        withNormalizeCSS=True,
+    )
+
+
+app.layout = serve_layout
+
+
 @callback(Output(div_page_content, "children"), Input(d_url, "pathname"))
 def display_page(pathname):
     logger.info(f"Page: {pathname}")
     if pathname == "/":
-        return pages.index.layout
+        return pages.index.layout()
     elif pathname == "/health":
         return html.P("OK")
     elif pathname == "/monthly":
-        return pages.monthly.layout
+        return pages.monthly.layout()
     elif pathname == "/leaderboards":
-        return pages.leaderboards.layout
+        return pages.leaderboards.layout()
     elif pathname == "/library":
-        return pages.library.layout
+        return pages.library.layout()
     else:
         return html.P(f"404 - Not Found: {pathname}")
 
 
+# Build the first snapshot before serving; preloaded workers inherit it on fork
+data.store.refresh()
+logger.info(f"Dashboard startup DB round trips: {query_counter}")
+
+
 if __name__ == "__main__":
     app.run_server(debug=True)
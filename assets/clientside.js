@@ -0,0 +1,86 @@
+function iconify(icon) {
+    return {namespace: "dash_iconify", type: "DashIconify", props: {icon: icon}};
+}
+
+function isoDate(year, monthIndex, day) {
+    const pad = (number) => String(number).padStart(2, "0");
+    return `${year}-${pad(monthIndex + 1)}-${pad(day)}`;
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    nlstats: {
+        // Library: add the page of cards sent by the server to the cards already
+        // shown, so they never travel back to the server
+        append_cards: function (page, children) {
+            if (!page) {
+                return window.dash_clientside.no_update;
+            }
+            if (page.replace || !children) {
+                return page.cards;
+            }
+            return [].concat(children, page.cards);
+        },
+
+        // Library: arrow of the sort direction, down for every other click
+        toggle_sort_arrow: function (n_clicks) {
+            if ((n_clicks || 0) % 2 === 0) {
+                return iconify("akar-icons:arrow-down-thick");
+            }
+            return iconify("akar-icons:arrow-up-thick");
+        },
+
+        toggle_modal: function (n_open, n_submit, opened) {
+            return !opened;
+        },
+
+        clear_selection_data: function (games, clear_n_clicks) {
+            return null;
+        },
+
+        // Library: the filter button stands out while points of the scatter are
+        // selected, which is also when they can be cleared
+        enable_clear_selection_button: function (selected_data) {
+            const empty = !selected_data || !selected_data.points
+                || selected_data.points.length === 0;
+            if (empty) {
+                return [true, "outline", null];
+            }
+            return [false, "filled", iconify("ci:filter")];
+        },
+
+        // Monthly: move the picked date a month along, on the last day of the month
+        // if it is shorter
+        update_calendar_from_button: function (n_clicks_next, n_clicks_prev, date_value) {
+            if (!date_value) {
+                return window.dash_clientside.no_update;
+            }
+
+            const triggered = window.dash_clientside.callback_context.triggered.map(
+                (trigger) => trigger.prop_id
+            );
+            let step;
+            if (triggered.includes("next-month-btn.n_clicks")) {
+                step = 1;
+            } else if (triggered.includes("prev-month-btn.n_clicks")) {
+                step = -1;
+            } else {
+                return window.dash_clientside.no_update;
+            }
+
+            const [year, month, day] = date_value.slice(0, 10).split("-").map(Number);
+            const first = new Date(Date.UTC(year, month - 1 + step, 1));
+            const lastDay = new Date(
+                Date.UTC(first.getUTCFullYear(), first.getUTCMonth() + 1, 0)
+            ).getUTCDate();
+            return isoDate(
+                first.getUTCFullYear(), first.getUTCMonth(), Math.min(day, lastDay)
+            );
+        },
+
+        // Leaderboards: the boards of a tab, starting on its first
+        switch_tab: function (active_tab, tab_selections) {
+            const selections = tab_selections[active_tab];
+            return [selections, selections[0].value];
+        },
+    },
+});
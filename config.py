@@ -1,8 +1,18 @@
+import os
+import tempfile
+from enum import Enum
 from typing import List
 
 from pydantic import BaseModel, BaseSettings
 
 
+class ProcessedStatStorage(str, Enum):
+    # A processed_stat row for every video in every collection event
+    full = "full"
+    # Rows only when a video's counters changed; readers carry the last value forward
+    delta = "delta"
+
+
 class GeneralSettings(BaseSettings):
     channel_id: str
     upload_playlist_id: str
@@ -17,6 +27,19 @@ class GeneralSettings(BaseSettings):
 
     start_date: str = "2011-06-01"
 
+    processed_stat_storage: ProcessedStatStorage = ProcessedStatStorage.full
+
+    snapshot_refresh_seconds: int = 600
+    # Shared by the workers of one host, which memory-map the snapshot files
+    snapshot_dir: str = os.path.join(tempfile.gettempdir(), "nlstats_snapshots")
+    # Rendered callback results shared by the workers of one host, up to this size
+    callback_cache_dir: str = os.path.join(tempfile.gettempdir(), "nlstats_callbacks")
+    callback_cache_max_mb: int = 256
+    # Threads per worker filling caches once a new snapshot is in use
+    cache_warm_threads: int = 2
+    # Time series charts are downsampled to this many points per trace; 0 keeps all
+    chart_max_points: int = 2000
+
     heroku_app_name: str = "nlstats"
     heroku_oauth_token: str
 
@@ -0,0 +1,103 @@
+import io
+from contextlib import closing
+from typing import Iterator
+
+import pandas as pd
+import pyarrow as pa
+from pyarrow import csv
+from sqlalchemy import Boolean, DateTime, Float, Integer, String
+from sqlalchemy.sql import Select
+
+from log import get_logger
+from .database import engine, query_counter
+
+logger = get_logger(__name__)
+
+NULL_MARKER = "\\N"
+
+
+def _arrow_type(sql_type) -> pa.DataType | None:
+    if isinstance(sql_type, DateTime):
+        # The COPY session runs in UTC, so aware timestamps always end in `+00`
+        return pa.timestamp("us", tz="UTC") if sql_type.timezone else pa.timestamp("us")
+    elif isinstance(sql_type, Boolean):
+        return pa.bool_()
+    elif isinstance(sql_type, Integer):
+        return pa.int64()
+    elif isinstance(sql_type, Float):
+        return pa.float64()
+    elif isinstance(sql_type, String):
+        return pa.string()
+
+    return None
+
+
+def _column_types(query: Select) -> dict:
+    column_types = {}
+    for column in query.selected_columns:
+        arrow_type = _arrow_type(column.type)
+        if arrow_type is not None:
+            column_types[column.name] = arrow_type
+
+    return column_types
+
+
+def read_arrow_table(query: Select) -> pa.Table:
+    """
+    Run `query` through `COPY ... TO STDOUT` and parse the result with the Arrow CSV
+    reader, so rows never become Python objects on the way to a columnar table.
+
+    Column names are taken from the query labels and column types from the SQL
+    types of the selected columns.
+    """
+    compiled = query.compile(
+        dialect=engine.dialect, compile_kwargs={"render_postcompile": True}
+    )
+    buffer = io.BytesIO()
+
+    with closing(engine.raw_connection()) as connection:
+        with connection.cursor() as cursor:
+            cursor.execute("SET TIME ZONE 'UTC'")
+            copy_sql = cursor.mogrify(
+                f"COPY ({compiled}) TO STDOUT "
+                f"WITH (FORMAT csv, HEADER, NULL '{NULL_MARKER}')",
+                compiled.params,
+            )
+            cursor.copy_expert(copy_sql.decode(), buffer)
+        # The raw DBAPI cursor bypasses the engine's execute events
+        query_counter.add(statements=2)
+
+    logger.debug(f"Copied {buffer.tell():,} bytes from the database")
+    buffer.seek(0)
+
+    return csv.read_csv(
+        buffer,
+        parse_options=csv.ParseOptions(newlines_in_values=True),
+        convert_options=csv.ConvertOptions(
+            column_types=_column_types(query),
+            null_values=[NULL_MARKER],
+            # How COPY writes booleans
+            true_values=["t"],
+            false_values=["f"],
+            strings_can_be_null=True,
+            quoted_strings_can_be_null=False,
+        ),
+    )
+
+
+def read_dataframe(query: Select) -> pd.DataFrame:
+    return read_arrow_table(query).to_pandas(split_blocks=True)
+
+
+def iter_dataframes(query: Select, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Stream `query` from a server-side cursor, yielding DataFrames of at most
+    `chunk_size` rows.  Only one chunk of rows is held in memory at a time.
+    """
+    columns = [column.name for column in query.selected_columns]
+
+    with engine.connect() as connection:
+        connection.exec_driver_sql("SET TIME ZONE 'UTC'")
+        result = connection.execution_options(stream_results=True).execute(query)
+        for partition in result.partitions(chunk_size):
+            yield pd.DataFrame(partition, columns=columns)
@@ -1 +1,8 @@
-from . import collection_event, conversion_rule, processed_stat, raw_data, video
+from . import (
+    collection_event,
+    conversion_rule,
+    processed_stat,
+    raw_data,
+    snapshot_bundle,
+    video,
+)
@@ -1,5 +1,9 @@
 from datetime import datetime
-from sqlalchemy import select
+from typing import List
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm.session import Session
+from sqlalchemy.sql.selectable import ScalarSelect
 
 from ..database import get_session
 from log import get_logger
@@ -7,6 +11,8 @@ from ..mappers import CollectionEvent
 
 logger = get_logger(__name__)
 
+COMPLETE_CHANNEL = "collection_event_complete"
+
 
 def get_earliest_event() -> datetime:
     with get_session() as session:
@@ -32,7 +38,11 @@ def create_collection_event() -> CollectionEvent:
     return db_item
 
 
-def update_collection_event_as_complete(collection_event_id: int):
+def update_collection_event_as_complete(collection_event_id: int, notify: bool = True):
+    """
+    With `notify`, listeners are told in the same transaction.  Otherwise call
+    `notify_collection_event_complete` once they should pick it up.
+    """
     with get_session() as session:
         db_item: CollectionEvent = session.execute(
             select(CollectionEvent).filter_by(id=collection_event_id)
@@ -41,10 +51,23 @@ def update_collection_event_as_complete(collection_event_id: int):
         db_item.complete = True
         logger.debug(f"Updated as complete: {db_item}")
 
+        if notify:
+            # Delivered to listeners only once the transaction commits
+            _notify_complete(session, collection_event_id)
         session.commit()
 
 
-def get_most_recent_collection_event() -> CollectionEvent:
+def _notify_complete(session: Session, collection_event_id: int):
+    session.execute(select(func.pg_notify(COMPLETE_CHANNEL, str(collection_event_id))))
+
+
+def notify_collection_event_complete(collection_event_id: int):
+    with get_session() as session:
+        _notify_complete(session, collection_event_id)
+        session.commit()
+
+
+def get_most_recent_collection_event() -> CollectionEvent | None:
     query = (
         select(CollectionEvent)
         .where(CollectionEvent.complete)
@@ -53,3 +76,36 @@ def get_most_recent_collection_event() -> CollectionEvent:
 
     with get_session() as session:
         return session.execute(query).scalars().first()
+
+
+def most_recent_collection_event_id() -> ScalarSelect:
+    """
+    Subquery for the ID of the most recent complete collection event, so callers can
+    resolve it in the same statement as their data query.
+    """
+    return (
+        select(CollectionEvent.id)
+        .where(CollectionEvent.complete)
+        .order_by(CollectionEvent.pull_datetime.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+
+
+def get_collection_events_before(cutoff: datetime) -> List[CollectionEvent]:
+    query = (
+        select(CollectionEvent)
+        .where(CollectionEvent.pull_datetime < cutoff)
+        .order_by(CollectionEvent.pull_datetime)
+    )
+
+    with get_session() as session:
+        return session.execute(query).scalars().all()
+
+
+def delete_collection_event(collection_event_id: int):
+    with get_session() as session:
+        session.execute(delete(CollectionEvent).filter_by(id=collection_event_id))
+        logger.debug(f"Deleted collection event {collection_event_id}")
+
+        session.commit()
@@ -1,11 +1,17 @@
-from typing import List
+from datetime import datetime
+from typing import Iterator, List
 
 import pandas as pd
 from pydantic import BaseModel
-from sqlalchemy import select
+from sqlalchemy import and_, delete, exists, func, literal, or_, select, update
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.selectable import ScalarSelect
 
+from config import ProcessedStatStorage, settings
 from log import get_logger
 from .. import crud
+from ..columnar import iter_dataframes, read_dataframe
 from ..database import get_session
 from ..mappers import CollectionEvent, ProcessedStat, Video
 
@@ -19,6 +25,7 @@ class CreateProcessedStat(BaseModel):
     views: int
     likes: int
     comments: int
+    deleted: bool = False
 
 
 def create_processed_stats(new_items: List[CreateProcessedStat]):
@@ -31,23 +38,72 @@ def create_processed_stats(new_items: List[CreateProcessedStat]):
         session.commit()
 
 
-def get_most_recent_processed_stat_dataframe() -> pd.DataFrame:
+class StatFilter(BaseModel):
     """
+    Predicates applied in the SQL `WHERE` clause of the stat queries.  Publish dates
+    are compared to the stored values, which are naive US/Eastern datetimes.
+    """
+
+    published_after: datetime | None = None
+    published_before: datetime | None = None
+    games: List[str] | None = None
+    first_collection_event_id: int | None = None
+    last_collection_event_id: int | None = None
+
+
+def _apply_stat_filter(
+    query: Select, stat_filter: StatFilter | None, event_id_column
+) -> Select:
+    if stat_filter is None:
+        return query
+
+    if stat_filter.published_after is not None:
+        query = query.where(Video.publish_date >= stat_filter.published_after)
+    if stat_filter.published_before is not None:
+        query = query.where(Video.publish_date < stat_filter.published_before)
+    if stat_filter.games is not None:
+        query = query.where(Video.game.in_(stat_filter.games))
+    if stat_filter.first_collection_event_id is not None:
+        query = query.where(event_id_column >= stat_filter.first_collection_event_id)
+    if stat_filter.last_collection_event_id is not None:
+        query = query.where(event_id_column <= stat_filter.last_collection_event_id)
+
+    return query
+
+
+def _of_complete_events(query: Select) -> Select:
+    # Stats of a pull that failed before its event was marked complete are never read,
+    # as in full storage, where only the rows of the requested event are
+    return query.join(ProcessedStat.collection_event).where(CollectionEvent.complete)
+
+
+def get_most_recent_processed_stat_dataframe(
+    stat_filter: StatFilter | None = None,
+) -> pd.DataFrame:
+    return get_processed_stat_dataframe(
+        crud.collection_event.most_recent_collection_event_id(), stat_filter
+    )
+
+
+def get_processed_stat_dataframe(
+    collection_event_id: int | ScalarSelect,
+    stat_filter: StatFilter | None = None,
+    with_description: bool = True,
+) -> pd.DataFrame:
+    """
+    Snapshot of every video's stats as of `collection_event_id`.
+
     Columns:
     - "id"
     - "Publish Date"
     - "Title"
-    - "Description"
+    - "Description" (only `with_description`)
     - "Duration (Seconds)"
     - "Game"
     - "Likes"
     - "Views"
     - "Comments"
     """
-    most_recent_collection_event = (
-        crud.collection_event.get_most_recent_collection_event()
-    )
-
     columns = {
         "id": Video.unique_youtube_id,
         "Publish Date": Video.publish_date,
@@ -59,22 +115,49 @@ def get_most_recent_processed_stat_dataframe() -> pd.DataFrame:
         "Views": ProcessedStat.views,
         "Comments": ProcessedStat.comments,
     }
+    if not with_description:
+        del columns["Description"]
+
+    if settings.processed_stat_storage == ProcessedStatStorage.delta:
+        # Last value carried forward: each video's newest row of a complete event up to
+        # the event, unless it marks the video as deleted
+        latest_stats = (
+            _of_complete_events(select(ProcessedStat))
+            .where(ProcessedStat.collection_event_id <= collection_event_id)
+            .distinct(ProcessedStat.video_id)
+            .order_by(ProcessedStat.video_id, ProcessedStat.collection_event_id.desc())
+            .subquery()
+        )
+        stats = aliased(ProcessedStat, latest_stats)
+        # Every carried forward row stands for the event itself, so event bounds
+        # apply to it rather than to the event a row was stored at
+        event_id_column = (
+            collection_event_id
+            if isinstance(collection_event_id, ScalarSelect)
+            else literal(collection_event_id)
+        )
+        condition = ~stats.deleted
+    else:
+        stats = ProcessedStat
+        event_id_column = ProcessedStat.collection_event_id
+        condition = ProcessedStat.collection_event_id == collection_event_id
+
+    columns.update(
+        {"Likes": stats.likes, "Views": stats.views, "Comments": stats.comments}
+    )
     query = (
-        select(list(columns.values()))
-        .where(ProcessedStat.collection_event_id == most_recent_collection_event.id)
-        .join(ProcessedStat.video_info)
+        select([column.label(name) for name, column in columns.items()])
+        .join(stats.video_info)
+        .where(condition)
     )
 
-    with get_session() as session:
-        data = session.execute(query).all()
+    return read_dataframe(_apply_stat_filter(query, stat_filter, event_id_column))
 
-    return pd.DataFrame(
-        data,
-        columns=list(columns.keys()),
-    )
 
+def _all_stats_query(stat_filter: StatFilter | None, with_description: bool) -> Select:
+    if settings.processed_stat_storage == ProcessedStatStorage.delta:
+        return _carried_forward_stats_query(stat_filter, with_description)
 
-def get_all_stats() -> pd.DataFrame:
     columns = {
         "id": Video.unique_youtube_id,
         "Publish Date": Video.publish_date,
@@ -88,16 +171,178 @@ def get_all_stats() -> pd.DataFrame:
         "Pull Date": CollectionEvent.pull_datetime,
         "Collection Event": CollectionEvent.id,
     }
+    if not with_description:
+        del columns["Description"]
+
     query = (
-        select(list(columns.values()))
+        select([column.label(name) for name, column in columns.items()])
         .join(ProcessedStat.video_info)
         .join(ProcessedStat.collection_event)
     )
 
-    with get_session() as session:
-        data = session.execute(query).all()
+    return _apply_stat_filter(query, stat_filter, CollectionEvent.id)
+
 
-    return pd.DataFrame(
-        data,
-        columns=list(columns.keys()),
+def _carried_forward_stats_query(
+    stat_filter: StatFilter | None, with_description: bool
+) -> Select:
+    """
+    Expand delta-only rows back into one row per video per complete collection event.
+    Each row stored at a complete event is valid from it until the video's next such
+    row, and rows marking a video as deleted are valid for no event.
+    """
+    stat_spans = _of_complete_events(
+        select(
+            ProcessedStat.video_id,
+            ProcessedStat.likes,
+            ProcessedStat.views,
+            ProcessedStat.comments,
+            ProcessedStat.deleted,
+            ProcessedStat.collection_event_id.label("first_event_id"),
+            func.lead(ProcessedStat.collection_event_id)
+            .over(
+                partition_by=ProcessedStat.video_id,
+                order_by=ProcessedStat.collection_event_id,
+            )
+            .label("next_event_id"),
+        )
+    ).subquery()
+
+    columns = {
+        "id": Video.unique_youtube_id,
+        "Publish Date": Video.publish_date,
+        "Title": Video.title,
+        "Description": Video.description,
+        "Duration (Seconds)": Video.duration_seconds,
+        "Game": Video.game,
+        "Likes": stat_spans.c.likes,
+        "Views": stat_spans.c.views,
+        "Comments": stat_spans.c.comments,
+        "Pull Date": CollectionEvent.pull_datetime,
+        "Collection Event": CollectionEvent.id,
+    }
+    if not with_description:
+        del columns["Description"]
+
+    query = (
+        select([column.label(name) for name, column in columns.items()])
+        .select_from(stat_spans)
+        .join(Video, Video.unique_youtube_id == stat_spans.c.video_id)
+        .join(
+            CollectionEvent,
+            and_(
+                CollectionEvent.complete,
+                CollectionEvent.id >= stat_spans.c.first_event_id,
+                or_(
+                    stat_spans.c.next_event_id.is_(None),
+                    CollectionEvent.id < stat_spans.c.next_event_id,
+                ),
+            ),
+        )
+        .where(~stat_spans.c.deleted)
     )
+
+    return _apply_stat_filter(query, stat_filter, CollectionEvent.id)
+
+
+def get_all_stats(
+    stat_filter: StatFilter | None = None, with_description: bool = True
+) -> pd.DataFrame:
+    return read_dataframe(_all_stats_query(stat_filter, with_description))
+
+
+def iter_all_stats(
+    stat_filter: StatFilter | None = None,
+    chunk_size: int = 50_000,
+    with_description: bool = True,
+) -> Iterator[pd.DataFrame]:
+    """
+    Same rows and columns as `get_all_stats`, streamed from a server-side cursor in
+    chunks of `chunk_size` rows.
+    """
+    return iter_dataframes(
+        _all_stats_query(stat_filter, with_description), chunk_size=chunk_size
+    )
+
+
+def get_latest_stored_counters() -> pd.DataFrame:
+    """
+    The newest counters of every video stored at a complete collection event,
+    whatever the storage mode.
+
+    Columns:
+    - "video_id"
+    - "views"
+    - "likes"
+    - "comments"
+    - "deleted"
+    """
+    query = (
+        _of_complete_events(
+            select(
+                ProcessedStat.video_id,
+                ProcessedStat.views,
+                ProcessedStat.likes,
+                ProcessedStat.comments,
+                ProcessedStat.deleted,
+            )
+        )
+        .distinct(ProcessedStat.video_id)
+        .order_by(ProcessedStat.video_id, ProcessedStat.collection_event_id.desc())
+    )
+
+    return read_dataframe(query)
+
+
+def compact_processed_stats(from_event_id: int, into_event_id: int, batch_size: int):
+    """
+    Fold the stats of one collection event into a later one, in batches of
+    `batch_size` rows with a commit after each batch.
+
+    In full storage every row of `from_event_id` is deleted, as `into_event_id` has
+    a row for every video it includes.  In delta storage a row is deleted when its
+    video has another row after `from_event_id` and up to `into_event_id`, otherwise
+    it is moved to `into_event_id`, where it would have been carried forward to.
+    """
+
+    def batch_of_ids(*criteria):
+        return (
+            select(ProcessedStat.id)
+            .where(ProcessedStat.collection_event_id == from_event_id, *criteria)
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+
+    if settings.processed_stat_storage == ProcessedStatStorage.delta:
+        later_stat = aliased(ProcessedStat)
+        superseded = exists().where(
+            later_stat.video_id == ProcessedStat.video_id,
+            later_stat.collection_event_id > from_event_id,
+            later_stat.collection_event_id <= into_event_id,
+        )
+        statements = [
+            delete(ProcessedStat).where(
+                ProcessedStat.id.in_(batch_of_ids(superseded))
+            ),
+            update(ProcessedStat)
+            .where(ProcessedStat.id.in_(batch_of_ids()))
+            .values(collection_event_id=into_event_id),
+        ]
+    else:
+        statements = [
+            delete(ProcessedStat).where(ProcessedStat.id.in_(batch_of_ids())),
+        ]
+
+    with get_session() as session:
+        for statement in statements:
+            while True:
+                result = session.execute(
+                    statement.execution_options(synchronize_session=False)
+                )
+                session.commit()
+                logger.debug(
+                    f"Compacted {result.rowcount} stats of collection event "
+                    f"{from_event_id} into {into_event_id}"
+                )
+                if result.rowcount < batch_size:
+                    break
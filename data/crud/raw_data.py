@@ -2,9 +2,11 @@ from typing import List
 
 import pandas as pd
 from pydantic import BaseModel
-from sqlalchemy import select
+from sqlalchemy import delete, select
+from sqlalchemy.sql.selectable import ScalarSelect
 
 from .. import crud
+from ..columnar import read_dataframe
 from ..database import get_session
 from log import get_logger
 from ..mappers import RawData
@@ -35,7 +37,9 @@ def create_raw_video_data(new_items: List[CreateRawData]):
         session.commit()
 
 
-def get_raw_dataframe_from_collection_event(event_id: int) -> pd.DataFrame:
+def get_raw_dataframe_from_collection_event(
+    event_id: int | ScalarSelect, limit: int | None = None
+) -> pd.DataFrame:
     columns = {
         "id": RawData.id,
         "video_id": RawData.video_id,
@@ -47,17 +51,14 @@ def get_raw_dataframe_from_collection_event(event_id: int) -> pd.DataFrame:
         "statistics": RawData.statistics,
     }
 
-    query = select(list(columns.values())).where(
-        RawData.collection_event_id == event_id
+    query = (
+        select([column.label(name) for name, column in columns.items()])
+        .where(RawData.collection_event_id == event_id)
+        .order_by(RawData.id)
+        .limit(limit)
     )
 
-    with get_session() as session:
-        data = session.execute(query).all()
-
-    return pd.DataFrame(
-        data,
-        columns=list(columns.keys()),
-    )
+    return read_dataframe(query)
 
 
 def get_most_recent_raw_dataframe() -> pd.DataFrame:
@@ -72,11 +73,18 @@ def get_most_recent_raw_dataframe() -> pd.DataFrame:
     - "content_details"
     - "statistics"
     """
-    most_recent_collection_event = (
-        crud.collection_event.get_most_recent_collection_event()
+    logger.info("Retrieving raw data from the most recent collection event")
+    return get_raw_dataframe_from_collection_event(
+        crud.collection_event.most_recent_collection_event_id()
     )
 
-    logger.info(
-        f"Retrieving raw data from collection event {most_recent_collection_event.id}"
-    )
-    return get_raw_dataframe_from_collection_event(most_recent_collection_event.id)
+
+def delete_raw_data(raw_data_ids: List[int]):
+    with get_session() as session:
+        session.execute(
+            delete(RawData)
+            .where(RawData.id.in_(raw_data_ids))
+            .execution_options(synchronize_session=False)
+        )
+
+        session.commit()
@@ -0,0 +1,41 @@
+from sqlalchemy import delete, select
+
+from ..database import get_session
+from log import get_logger
+from ..mappers import SnapshotBundle
+
+logger = get_logger(__name__)
+
+
+def save_snapshot_bundle(collection_event_id: int, format_version: int, bundle: bytes):
+    """Store the bundle of a collection event, replacing any previous one"""
+    db_item = SnapshotBundle(
+        collection_event_id=collection_event_id,
+        format_version=format_version,
+        bundle=bundle,
+    )
+
+    with get_session() as session:
+        session.merge(db_item)
+        session.commit()
+
+    logger.debug(f"Saved snapshot bundle: {db_item}")
+
+
+def get_snapshot_bundle(collection_event_id: int, format_version: int) -> bytes | None:
+    query = select(SnapshotBundle.bundle).filter_by(
+        collection_event_id=collection_event_id, format_version=format_version
+    )
+
+    with get_session() as session:
+        return session.execute(query).scalar_one_or_none()
+
+
+def delete_snapshot_bundles_before(collection_event_id: int):
+    with get_session() as session:
+        session.execute(
+            delete(SnapshotBundle).where(
+                SnapshotBundle.collection_event_id < collection_event_id
+            )
+        )
+        session.commit()
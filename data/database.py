@@ -1,9 +1,18 @@
-from sqlalchemy import create_engine
+import select
+import threading
+from contextlib import closing, contextmanager
+from typing import Iterator
+
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.orm.session import Session
 from sqlalchemy.pool import NullPool
 
 from config import settings
+from log import get_logger
+
+logger = get_logger(__name__)
 
 nldb_url = (
     f"postgresql+psycopg2://{settings.db_username}:{settings.db_password}@"
@@ -19,3 +28,74 @@ Base = declarative_base()
 
 def get_session() -> Session:
     return SessionFactory()
+
+
+class QueryCounter:
+    """
+    Process-wide count of DB connections and statements.  With `NullPool` every
+    connection is a fresh connect, so both count as round trips.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connections = 0
+        self.statements = 0
+
+    def add(self, connections: int = 0, statements: int = 0):
+        with self._lock:
+            self.connections += connections
+            self.statements += statements
+
+    def __str__(self):
+        return f"{self.connections} connections, {self.statements} statements"
+
+
+query_counter = QueryCounter()
+
+
+@event.listens_for(engine, "connect")
+def _count_connection(dbapi_connection, connection_record):
+    query_counter.add(connections=1)
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _count_statement(connection, cursor, statement, parameters, context, executemany):
+    query_counter.add(statements=1)
+
+
+@contextmanager
+def log_query_count(name: str):
+    """Log the DB round trips made inside the block, by any thread"""
+    connections, statements = query_counter.connections, query_counter.statements
+    try:
+        yield
+    finally:
+        logger.info(
+            f"{name} DB round trips: "
+            f"{query_counter.connections - connections} connections, "
+            f"{query_counter.statements - statements} statements"
+        )
+
+
+def listen(channel: str, timeout: float) -> Iterator[str | None]:
+    """
+    Yield the payload of every `NOTIFY` sent on `channel`, or None whenever `timeout`
+    seconds pass without one.  Holds a dedicated connection while iterated; connection
+    errors are raised to the caller.
+    """
+    with closing(engine.raw_connection()) as connection:
+        connection.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        with connection.cursor() as cursor:
+            cursor.execute(f'LISTEN "{channel}"')
+        query_counter.add(statements=1)
+
+        dbapi_connection = connection.dbapi_connection
+        while True:
+            readable, _, _ = select.select([dbapi_connection], [], [], timeout)
+            if not readable:
+                yield None
+                continue
+
+            dbapi_connection.poll()
+            while dbapi_connection.notifies:
+                yield dbapi_connection.notifies.pop(0).payload
@@ -1,6 +1,15 @@
-from sqlalchemy import Column, ForeignKey, Integer, String, DateTime, Boolean
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+)
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import false, func
 
 from .database import Base
 
@@ -109,7 +118,14 @@ class RawData(Base):
 
 class ProcessedStat(Base):
     __tablename__ = "processed_stat"
-    __table_args__ = {"schema": "youtube"}
+    __table_args__ = (
+        Index(
+            "ix_processed_stat_video_id_collection_event_id",
+            "video_id",
+            "collection_event_id",
+        ),
+        {"schema": "youtube"},
+    )
 
     id = Column(Integer, primary_key=True)
     video_id = Column(
@@ -121,6 +137,8 @@ class ProcessedStat(Base):
     views = Column(Integer, nullable=False)
     likes = Column(Integer, nullable=False)
     comments = Column(Integer, nullable=False)
+    # Delta storage: the video is gone from the channel as of this event
+    deleted = Column(Boolean, nullable=False, server_default=false())
 
     collection_event = relationship("CollectionEvent", back_populates="processed_stats")
     video_info = relationship("Video", back_populates="processed_stats")
@@ -135,3 +153,29 @@ class ProcessedStat(Base):
             f"comments={self.comments}, "
             "]>"
         )
+
+
+class SnapshotBundle(Base):
+    __tablename__ = "snapshot_bundle"
+    __table_args__ = {"schema": "youtube"}
+
+    collection_event_id = Column(
+        Integer,
+        ForeignKey("youtube.collection_event.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    format_version = Column(Integer, nullable=False)
+    created_datetime = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    bundle = Column(LargeBinary, nullable=False)
+
+    def __repr__(self):
+        return (
+            "SnapshotBundle<["
+            f"collection_event_id={self.collection_event_id}, "
+            f"format_version={self.format_version}, "
+            f"created_datetime={self.created_datetime}, "
+            f"bundle=<{len(self.bundle or b'')} bytes> "
+            "]>"
+        )
@@ -1,19 +1,25 @@
 from fire import Fire
 from .pipelines import (
+    apply_retention,
     process_raw_local_youtube_data,
     process_raw_local_to_db,
+    publish_snapshot_bundle,
     pull_videos_to_local,
     pull_videos_to_db,
 )
 from data import crud
+from data.database import log_query_count
 
 if __name__ == "__main__":
-    Fire(
-        {
-            "pull": pull_videos_to_db.execute,
-            "repull": process_raw_local_to_db.execute,
-            "pull_local": pull_videos_to_local.execute,
-            "process": process_raw_local_youtube_data.execute,
-            "convert": crud.video.update_video_games,
-        }
-    )
+    with log_query_count("ETL"):
+        Fire(
+            {
+                "pull": pull_videos_to_db.execute,
+                "repull": process_raw_local_to_db.execute,
+                "pull_local": pull_videos_to_local.execute,
+                "process": process_raw_local_youtube_data.execute,
+                "convert": crud.video.update_video_games,
+                "retention": apply_retention.execute,
+                "publish": publish_snapshot_bundle.execute,
+            }
+        )
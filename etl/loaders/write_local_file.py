@@ -27,3 +27,16 @@ def write_latest_processed_youtube(df: pd.DataFrame) -> pd.DataFrame:
     path = _get_filepath("youtube")
     df.to_parquet(path, engine="fastparquet")
     return df
+
+
+def write_raw_data_archive(df: pd.DataFrame, archive_dir: str) -> pd.DataFrame:
+    """
+    One file per batch, named after its first raw_data ID, so re-archiving a batch
+    that was not deleted overwrites the same file.
+    """
+    logger.debug(f"write_raw_data_archive {df.shape=}")
+    os.makedirs(archive_dir, exist_ok=True)
+    event_id, first_id = df["collection_event_id"].iloc[0], df["id"].iloc[0]
+    path = os.path.join(archive_dir, f"raw_data_event_{event_id}_{first_id}.parquet")
+    df.to_parquet(path, engine="fastparquet")
+    return df
@@ -1,6 +1,8 @@
 import json
+from typing import List
 
 import pandas as pd
+from config import ProcessedStatStorage, settings
 from data import crud
 from log import get_logger
 
@@ -67,6 +69,56 @@ def write_latest_processed_youtube(
             )
         )
 
+    if settings.processed_stat_storage == ProcessedStatStorage.delta:
+        new_stats = _delta_stats(new_stats, collection_event_id)
+
     crud.video.update_video_data(video_updates)
     crud.processed_stat.create_processed_stats(new_stats)
     return df
+
+
+def _delta_stats(
+    new_stats: List[crud.processed_stat.CreateProcessedStat],
+    collection_event_id: int,
+) -> List[crud.processed_stat.CreateProcessedStat]:
+    """
+    The stats that differ from each video's newest stored row, and a row marking as
+    deleted every stored video missing from `new_stats`
+    """
+    stored_counters = (
+        crud.processed_stat.get_latest_stored_counters()
+        .set_index("video_id")
+        .to_dict("index")
+    )
+
+    changed_stats = [
+        stat
+        for stat in new_stats
+        if stored_counters.get(stat.video_id)
+        != {
+            "views": stat.views,
+            "likes": stat.likes,
+            "comments": stat.comments,
+            "deleted": False,
+        }
+    ]
+
+    pulled_ids = {stat.video_id for stat in new_stats}
+    deleted_stats = [
+        crud.processed_stat.CreateProcessedStat(
+            video_id=video_id,
+            collection_event_id=collection_event_id,
+            views=counters["views"],
+            likes=counters["likes"],
+            comments=counters["comments"],
+            deleted=True,
+        )
+        for video_id, counters in stored_counters.items()
+        if video_id not in pulled_ids and not counters["deleted"]
+    ]
+
+    logger.info(
+        f"Delta storage: writing {len(changed_stats)} of {len(new_stats)} "
+        f"processed stats, and {len(deleted_stats)} deleted videos"
+    )
+    return changed_stats + deleted_stats
@@ -0,0 +1,96 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from ..loaders.write_local_file import write_raw_data_archive
+from data import crud
+from log import get_logger
+
+logger = get_logger(__name__)
+
+GRANULARITIES = {"weekly": "W", "monthly": "M"}
+
+DEFAULT_ARCHIVE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "local_data", "archive"
+)
+
+
+def _events_to_compact(cutoff: datetime, freq: str) -> dict:
+    """
+    Map every collection event older than `cutoff` that precedes the last complete
+    event of its week/month to that event, which its history is folded into.
+    """
+    events = crud.collection_event.get_collection_events_before(cutoff)
+    if not events:
+        return {}
+
+    df_events = pd.DataFrame(
+        [(e.id, e.pull_datetime, e.complete) for e in events],
+        columns=["id", "pull_datetime", "complete"],
+    )
+    df_events["period"] = (
+        pd.to_datetime(df_events["pull_datetime"], utc=True)
+        .dt.tz_localize(None)
+        .dt.to_period(freq)
+    )
+    kept_events = (
+        df_events[df_events["complete"]].groupby("period")["id"].last().rename("into")
+    )
+    df_events = df_events.join(kept_events, on="period").dropna(subset=["into"])
+
+    return {
+        int(row["id"]): int(row["into"])
+        for _, row in df_events[df_events["id"] < df_events["into"]].iterrows()
+    }
+
+
+def _archive_and_delete_raw_data(event_id: int, batch_size: int, archive_dir: str):
+    while True:
+        df_raw = crud.raw_data.get_raw_dataframe_from_collection_event(
+            event_id, limit=batch_size
+        )
+        if df_raw.empty:
+            break
+
+        write_raw_data_archive(df_raw, archive_dir=archive_dir)
+        crud.raw_data.delete_raw_data(df_raw["id"].tolist())
+        logger.debug(f"Archived {len(df_raw)} raw data rows of event {event_id}")
+
+
+def execute(
+    max_age_days: int = 365,
+    granularity: str = "weekly",
+    batch_size: int = 5000,
+    archive_dir: str = DEFAULT_ARCHIVE_DIR,
+):
+    """
+    Downsample the stat history older than `max_age_days` to one collection event per
+    week or month (`granularity`).  Raw data of the removed events is archived to
+    Parquet files in `archive_dir` before deletion.  Work is committed in batches of
+    `batch_size` rows, and rerunning picks up wherever a previous run stopped.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {list(GRANULARITIES)}")
+
+    logger.info("--- RETENTION PIPELINE ---")
+    cutoff = datetime.now(timezone.utc) - timedelta(days=max_age_days)
+    compactions = _events_to_compact(cutoff, GRANULARITIES[granularity])
+    logger.info(
+        f"Compacting {len(compactions)} collection events before {cutoff} "
+        f"into {len(set(compactions.values()))} {granularity} snapshots"
+    )
+
+    for from_event_id, into_event_id in compactions.items():
+        logger.info(f"Compacting collection event {from_event_id} -> {into_event_id}")
+        crud.processed_stat.compact_processed_stats(
+            from_event_id=from_event_id,
+            into_event_id=into_event_id,
+            batch_size=batch_size,
+        )
+        _archive_and_delete_raw_data(
+            from_event_id, batch_size=batch_size, archive_dir=archive_dir
+        )
+        crud.collection_event.delete_collection_event(from_event_id)
+
+    logger.info("--- PIPELINE COMPLETE ---")
@@ -0,0 +1,32 @@
+from data import crud
+from log import get_logger
+from webapp.dashboard import data, snapshot_files
+
+# Importing the exporters registers their parts; they leave out Dash, which the
+# pages would load into every ETL command
+from webapp.dashboard import index_data, index_figures  # noqa: F401
+
+logger = get_logger(__name__)
+
+
+def execute():
+    """
+    Build the dashboard snapshot of the most recent complete collection event and
+    publish it as a bundle that web workers load instead of building it themselves.
+    """
+    logger.info("--- PUBLISH SNAPSHOT BUNDLE PIPELINE ---")
+    collection_event = crud.collection_event.get_most_recent_collection_event()
+
+    bundle = data.build_snapshot_bundle(collection_event)
+    crud.snapshot_bundle.save_snapshot_bundle(
+        collection_event.id,
+        format_version=snapshot_files.FORMAT_VERSION,
+        bundle=bundle,
+    )
+    crud.snapshot_bundle.delete_snapshot_bundles_before(collection_event.id)
+    logger.info(
+        f"Published {len(bundle):,} byte snapshot bundle of collection event "
+        f"{collection_event.id}"
+    )
+
+    logger.info("--- PIPELINE COMPLETE ---")
@@ -1,3 +1,4 @@
+from . import publish_snapshot_bundle
 from ..loaders import write_to_db
 from ..datasources.youtube import pull_uploads_from_youtube
 from ..processing.key_youtube_columns import clean_video_data, convert_games
@@ -28,6 +29,13 @@ def execute():
     )
 
     logger.info("--- PIPELINE COMPLETE ---")
+    # Web workers are only notified once the bundle is ready, so they load it
+    # instead of building the snapshot themselves
     crud.collection_event.update_collection_event_as_complete(
-        collection_event_id=collection_event.id
+        collection_event_id=collection_event.id, notify=False
     )
+    try:
+        publish_snapshot_bundle.execute()
+    except Exception:
+        logger.exception("Failed to publish the snapshot bundle")
+    crud.collection_event.notify_collection_event_complete(collection_event.id)
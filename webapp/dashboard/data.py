@@ -1,11 +1,24 @@
-from datetime import timedelta
-import math
-from typing import List
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import wraps
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, Iterable, TypeVar
 
 import pandas as pd
 import numpy as np
 
 from data import crud
+from data.database import listen
+from . import snapshot_files
+from .game_index import GameIndex
+from .shared_cache import SharedCache
+from .video_stats_store import VideoStatsCube, VideoStatsStore
 from log import get_logger
 from config import settings
 
@@ -16,213 +29,683 @@ def convert_seconds(seconds):
     return str(timedelta(seconds=seconds))
 
 
-earliest_pull_date = crud.collection_event.get_earliest_event()
+def as_stored_publish_date(value) -> datetime:
+    """Publish dates are stored in the DB as naive US/Eastern datetimes"""
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert("US/Eastern").tz_localize(None)
 
+    return timestamp.to_pydatetime()
 
-def get_all_video_stats():
-    logger.info("Creating 'All Video' stats")
-    df_all_video_stats = crud.processed_stat.get_all_stats()
-    df_all_video_stats["Likes per 1000 Views"] = df_all_video_stats["Likes"] / (
-        df_all_video_stats["Views"] / 1000
-    )
-    df_all_video_stats["Comments per 1000 Views"] = df_all_video_stats["Comments"] / (
-        df_all_video_stats["Views"] / 1000
-    )
-    df_all_video_stats["Publish Date"] = df_all_video_stats[
-        "Publish Date"
-    ].dt.tz_localize("US/Eastern", nonexistent="shift_forward")
-    df_all_video_stats = df_all_video_stats[
-        df_all_video_stats["Publish Date"] >= settings.start_date
-    ]
-    df_all_video_stats["Time Elapsed"] = (
-        df_all_video_stats["Pull Date"] - df_all_video_stats["Publish Date"]
+
+def _all_stats_filter(collection_event_id: int) -> crud.processed_stat.StatFilter:
+    earliest_pull_date = crud.collection_event.get_earliest_event()
+    return crud.processed_stat.StatFilter(
+        published_after=max(
+            as_stored_publish_date(settings.start_date),
+            as_stored_publish_date(earliest_pull_date),
+        ),
+        last_collection_event_id=collection_event_id,
     )
-    df_all_video_stats["Days Elapsed"] = (
-        df_all_video_stats["Time Elapsed"]
-        .apply(lambda et: et.total_seconds() / 86400)
-        .round(decimals=1)
+
+
+def _add_elapsed_time_columns(df_stats: pd.DataFrame) -> pd.DataFrame:
+    df_stats["Likes per 1000 Views"] = df_stats["Likes"] / (df_stats["Views"] / 1000)
+    df_stats["Comments per 1000 Views"] = df_stats["Comments"] / (
+        df_stats["Views"] / 1000
     )
-    df_all_video_stats = df_all_video_stats.sort_values(by="Pull Date")
-    df_all_video_stats = df_all_video_stats[
-        df_all_video_stats["Publish Date"] >= earliest_pull_date
-    ]
-    num_bins = math.ceil(df_all_video_stats["Days Elapsed"].max())
-    df_all_video_stats["Bin"] = pd.cut(
-        df_all_video_stats["Days Elapsed"], bins=num_bins
+    df_stats["Publish Date"] = df_stats["Publish Date"].dt.tz_localize(
+        "US/Eastern", nonexistent="shift_forward"
     )
+    df_stats["Time Elapsed"] = df_stats["Pull Date"] - df_stats["Publish Date"]
+    df_stats["Days Elapsed"] = (
+        df_stats["Time Elapsed"].dt.total_seconds() / 86400
+    ).round(decimals=1)
+
+    return df_stats
+
+
+_DESCRIBE_COLUMNS = ["count", "mean", "std", "min", "25%", "50%", "75%", "max"]
+# Columns of the stat history once elapsed time columns are added
+_HISTORY_COLUMNS = [
+    "id",
+    "Publish Date",
+    "Title",
+    "Duration (Seconds)",
+    "Game",
+    "Likes",
+    "Views",
+    "Comments",
+    "Pull Date",
+    "Collection Event",
+    "Likes per 1000 Views",
+    "Comments per 1000 Views",
+    "Time Elapsed",
+    "Days Elapsed",
+]
+
 
-    return df_all_video_stats
+class DailyPerformanceAccumulator:
+    """
+    Folds chunks of the stat history into a views distribution per day elapsed
+    since publishing.  Only rows within `max_days` of publishing are kept, so memory
+    is bounded by the number of recent snapshots per video instead of the history.
+    """
+
+    def __init__(self, max_days: int):
+        self.max_days = max_days
+        self._views = {}
+        self._days_elapsed_sum = {}
+
+    def add(self, df_stats: pd.DataFrame):
+        df_stats = df_stats[
+            (df_stats["Days Elapsed"] >= 0)
+            & (df_stats["Days Elapsed"] < self.max_days + 1)
+        ]
+        day_bins = df_stats["Days Elapsed"].floordiv(1).astype(int)
+        for day_bin, df_bin in df_stats.groupby(day_bins):
+            self._views.setdefault(day_bin, []).append(df_bin["Views"].to_numpy())
+            self._days_elapsed_sum[day_bin] = (
+                self._days_elapsed_sum.get(day_bin, 0)
+                + df_bin["Time Elapsed"].dt.total_seconds().sum() / 86400
+            )
+
+    def describe(self) -> pd.DataFrame:
+        """
+        Columns: "count", "mean", "std", "min", "25%", "50%", "75%", "max", indexed
+        by the mean "Days Elapsed" of each daily bin.
+        """
+        rows = {}
+        for day_bin in sorted(self._views):
+            views = pd.Series(np.concatenate(self._views[day_bin]))
+            days_elapsed = round(self._days_elapsed_sum[day_bin] / len(views), 1)
+            rows[days_elapsed] = views.describe()
+
+        # Columns are kept even when no video is young enough to have a bin
+        df_describe = pd.DataFrame.from_dict(rows, orient="index").reindex(
+            columns=_DESCRIBE_COLUMNS
+        )
+        df_describe.index.name = "Days Elapsed"
+
+        return df_describe.loc[df_describe.index <= self.max_days]
+
+
+def get_daily_performance_stats(
+    snapshot: "Snapshot",
+    max_days: int,
+    new_video_min_days: int,
+    chunk_size: int = 50_000,
+):
+    """
+    Stream the stat history up to the snapshot once and return:
+    - The per-day views distribution of every video's first `max_days` days
+    - The stat history of videos published between `new_video_min_days` and
+      `max_days` days ago
+    """
+    logger.info("Creating daily performance stats")
+    now = pd.Timestamp.now(tz="UTC")
+    accumulator = DailyPerformanceAccumulator(max_days=max_days)
+    new_video_chunks = []
+
+    for df_chunk in crud.processed_stat.iter_all_stats(
+        stat_filter=_all_stats_filter(snapshot.collection_event_id),
+        chunk_size=chunk_size,
+        with_description=False,
+    ):
+        df_chunk = _add_elapsed_time_columns(df_chunk)
+        accumulator.add(df_chunk)
+
+        video_age = now - df_chunk["Publish Date"]
+        new_video_chunks.append(
+            df_chunk[
+                (video_age <= pd.Timedelta(max_days, "days"))
+                & (video_age >= pd.Timedelta(new_video_min_days, "days"))
+            ]
+        )
+
+    if new_video_chunks:
+        df_new_videos_stats = pd.concat(new_video_chunks).sort_values(by="Pull Date")
+    else:
+        # No stats up to the snapshot at all
+        df_new_videos_stats = pd.DataFrame(columns=_HISTORY_COLUMNS)
+
+    return accumulator.describe(), df_new_videos_stats
+
+
+def get_latest_video_stats(collection_event_id: int) -> pd.DataFrame:
+    logger.info("Creating 'Latest Video' stats")
+    df_latest_video_stats = crud.processed_stat.get_processed_stat_dataframe(
+        collection_event_id,
+        stat_filter=crud.processed_stat.StatFilter(
+            published_after=as_stored_publish_date(settings.start_date)
+        ),
+        with_description=False,
+    )
+    df_latest_video_stats["Likes per 1000 Views"] = (
+        df_latest_video_stats["Likes"] / (df_latest_video_stats["Views"] / 1000)
+    ).round(3)
+    df_latest_video_stats["Comments per 1000 Views"] = (
+        df_latest_video_stats["Comments"] / (df_latest_video_stats["Views"] / 1000)
+    ).round(3)
+
+    df_latest_video_stats["Publish Date"] = df_latest_video_stats[
+        "Publish Date"
+    ].dt.tz_localize("US/Eastern", nonexistent="shift_forward")
 
+    return df_latest_video_stats
 
-# -- Latest Video Stats --
-logger.info("Creating 'Latest Video' stats")
-df_latest_video_stats = crud.processed_stat.get_most_recent_processed_stat_dataframe()
-df_latest_video_stats["Likes per 1000 Views"] = (
-    df_latest_video_stats["Likes"] / (df_latest_video_stats["Views"] / 1000)
-).round(3)
-df_latest_video_stats["Comments per 1000 Views"] = (
-    df_latest_video_stats["Comments"] / (df_latest_video_stats["Views"] / 1000)
-).round(3)
 
-df_latest_video_stats["Publish Date"] = df_latest_video_stats[
-    "Publish Date"
-].dt.tz_localize("US/Eastern", nonexistent="shift_forward")
-df_latest_video_stats = df_latest_video_stats[
-    df_latest_video_stats["Publish Date"] >= settings.start_date
-]
+def get_per_game_stats(df_latest_video_stats: pd.DataFrame) -> pd.DataFrame:
+    df_per_game_stats = (
+        df_latest_video_stats[["Likes", "Views", "Game"]]
+        .groupby("Game", observed=True)
+        .agg(["sum", "count"])
+    )
+    df_per_game_stats.columns = df_per_game_stats.columns.map("_".join)
+
+    df_per_game_stats = (
+        df_per_game_stats.drop(["Likes_count"], axis=1)
+        .reset_index()
+        .rename(
+            {"Likes_sum": "Likes", "Views_sum": "Views", "Views_count": "Video Count"},
+            axis=1,
+        )
+    )
+    df_per_game_stats["Likes per 1000 Views"] = df_per_game_stats["Likes"] / (
+        df_per_game_stats["Views"] / 1000
+    )
 
-df_latest_video_stats["Duration"] = df_latest_video_stats["Duration (Seconds)"].apply(
-    convert_seconds
-)
-all_games = (
-    df_latest_video_stats.groupby("Game")["Title"].count().sort_values(ascending=False)
-)
-most_uploaded = df_latest_video_stats["Game"].value_counts().index.tolist()[:4]
+    df_per_game_stats["Average Views Per Video"] = (
+        df_per_game_stats["Views"] / df_per_game_stats["Video Count"]
+    ).astype(int)
 
-df_per_game_stats = (
-    df_latest_video_stats[["Likes", "Views", "Game"]]
-    .groupby("Game")
-    .agg(["sum", "count"])
-)
-df_per_game_stats.columns = df_per_game_stats.columns.map("_".join)
-
-df_per_game_stats = (
-    df_per_game_stats.drop(["Likes_count"], axis=1)
-    .reset_index()
-    .rename(
-        {"Likes_sum": "Likes", "Views_sum": "Views", "Views_count": "Video Count"},
-        axis=1,
+    df_per_game_stats["Average Like Rate Per Video"] = (
+        df_per_game_stats["Likes per 1000 Views"] / df_per_game_stats["Video Count"]
     )
-)
-df_per_game_stats["Likes per 1000 Views"] = df_per_game_stats["Likes"] / (
-    df_per_game_stats["Views"] / 1000
-)
 
-df_per_game_stats["Average Views Per Video"] = (
-    df_per_game_stats["Views"] / df_per_game_stats["Video Count"]
-).astype(int)
+    return df_per_game_stats
 
-df_per_game_stats["Average Like Rate Per Video"] = (
-    df_per_game_stats["Likes per 1000 Views"] / df_per_game_stats["Video Count"]
-)
 
+T = TypeVar("T")
 
-def obtain_ranked_df(
-    df: pd.DataFrame,
-    rank_by_col: str,
-    columns_shown: List[str],
-    filter_function=None,
-    str_conv_col: str | None = None,
-    float_conversion: bool = False,
-):
-    df = df.copy()
-    if filter_function:
-        df = filter_function(df)
 
-    ranking_col_name = "Ranking"
+# Dashboard frames only ever show these columns of the latest video stats
+VIDEO_STATS_DTYPES = {
+    "id": pd.StringDtype("pyarrow"),
+    "Publish Date": "datetime64[ns, US/Eastern]",
+    "Title": pd.StringDtype("pyarrow"),
+    "Duration (Seconds)": "int32",
+    "Game": "category",
+    "Likes": "int32",
+    "Views": "int32",
+    "Comments": "int32",
+    "Likes per 1000 Views": "float64",
+    "Comments per 1000 Views": "float64",
+}
 
-    df[ranking_col_name] = (
-        df[rank_by_col].rank(ascending=False, method="min").astype(int)
-    )
-    df = df.sort_values(by="Ranking", ascending=True)[
-        [ranking_col_name] + columns_shown
-    ]
 
-    if str_conv_col:
-        if float_conversion:
-            df[str_conv_col] = df[str_conv_col].map("{:.02f}".format)
-        else:
-            df[str_conv_col] = df[str_conv_col].map("{:,d}".format)
+def compact_video_stats(df_latest_video_stats: pd.DataFrame) -> pd.DataFrame:
+    """
+    Narrow the latest video stats to `VIDEO_STATS_DTYPES`: per-video counters fit in
+    32 bits, the few hundred games become categories and strings are Arrow-backed.
+    Columns that no page reads are dropped.
+    """
+    return df_latest_video_stats[list(VIDEO_STATS_DTYPES)].astype(VIDEO_STATS_DTYPES)
 
-    return df
 
+def frame_memory_usage(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(index=True, deep=True).sum())
 
-df_biggest_view_getters = obtain_ranked_df(
-    df=df_per_game_stats,
-    rank_by_col="Average Views Per Video",
-    columns_shown=["Game", "Average Views Per Video", "Video Count"],
-    filter_function=lambda df: df[df["Video Count"] > 4],
-    str_conv_col="Average Views Per Video",
-)
 
-df_most_viewed_games = obtain_ranked_df(
-    df=df_per_game_stats,
-    rank_by_col="Views",
-    columns_shown=["Game", "Views", "Video Count"],
-    str_conv_col="Views",
-)
+def log_memory_report(
+    frames: Dict[str, pd.DataFrame], df_full_video_stats: pd.DataFrame
+):
+    """
+    Log the memory each frame takes, and the latest video stats per video before and
+    after `compact_video_stats`
+    """
+    video_count = max(len(df_full_video_stats), 1)
+    full_bytes = frame_memory_usage(df_full_video_stats)
+    compact_bytes = frame_memory_usage(frames["df_latest_video_stats"])
+    logger.info(
+        f"Latest video stats: {full_bytes / video_count:,.0f} bytes per video at "
+        f"full width, {compact_bytes / video_count:,.0f} compacted"
+    )
 
-df_most_published_games = obtain_ranked_df(
-    df=df_per_game_stats,
-    rank_by_col="Video Count",
-    columns_shown=["Game", "Video Count"],
-)
+    total_bytes = 0
+    for name, df in frames.items():
+        frame_bytes = frame_memory_usage(df)
+        total_bytes += frame_bytes
+        logger.debug(f"Snapshot frame {name}: {frame_bytes:,} bytes, {len(df)} rows")
 
-df_most_viewed_videos = obtain_ranked_df(
-    df=df_latest_video_stats,
-    rank_by_col="Views",
-    columns_shown=["id", "Title", "Publish Date", "Views"],
-    str_conv_col="Views",
-)
+    logger.info(
+        f"Snapshot frames: {total_bytes:,} bytes for {len(df_full_video_stats)} "
+        f"videos, {total_bytes / video_count:,.0f} bytes per video"
+    )
 
-df_longest_videos = obtain_ranked_df(
-    df=df_latest_video_stats,
-    rank_by_col="Duration (Seconds)",
-    columns_shown=["id", "Title", "Publish Date", "Views", "Duration"],
-    str_conv_col="Views",
-)
 
-df_video_highest_like_rate = obtain_ranked_df(
-    df=df_latest_video_stats,
-    rank_by_col="Likes per 1000 Views",
-    columns_shown=["id", "Title", "Publish Date", "Likes per 1000 Views", "Views"],
-)
+def build_snapshot_frames(df_latest_video_stats: pd.DataFrame) -> dict:
+    """Every frame of a `Snapshot`, keyed by attribute name"""
+    frames = {
+        # Kept in publish date order, which the `VideoStatsStore` of a snapshot indexes
+        "df_latest_video_stats": compact_video_stats(
+            df_latest_video_stats
+        ).sort_values(by="Publish Date", kind="stable", ignore_index=True),
+        "df_per_game_stats": get_per_game_stats(df_latest_video_stats),
+    }
+    log_memory_report(frames, df_full_video_stats=df_latest_video_stats)
+
+    return frames
+
+
+class Snapshot:
+    """
+    Every dashboard frame built from one complete collection event.  Snapshots are
+    never modified after they are built; a refresh replaces the whole object.
+    """
+
+    def __init__(
+        self,
+        collection_event_id: int,
+        pull_datetime: datetime,
+        frames: Dict[str, pd.DataFrame],
+        parts: Dict[str, snapshot_files.BundlePart] | None = None,
+    ):
+        self.collection_event_id = collection_event_id
+        self.pull_datetime = pull_datetime
+        self._parts = parts or {}
+
+        self.df_latest_video_stats = frames["df_latest_video_stats"]
+        self.df_per_game_stats = frames["df_per_game_stats"]
+
+        self.all_games = (
+            self.df_latest_video_stats.groupby("Game", observed=True)["Title"]
+            .count()
+            .sort_values(ascending=False, kind="stable")
+        )
+        self.most_uploaded = (
+            self.df_latest_video_stats["Game"].value_counts().index.tolist()[:4]
+        )
+        self.game_index = GameIndex(self.all_games)
+        self.videos = VideoStatsStore(self.df_latest_video_stats)
+        self.cube = VideoStatsCube(self.videos)
+
+        self._derived = {}
+        self._derived_lock = threading.RLock()
+
+    def bundled(self, part_name: str) -> snapshot_files.BundlePart | None:
+        """The part exported under `part_name` if this snapshot came from a bundle"""
+        return self._parts.get(part_name)
+
+    def get_derived(self, builder: Callable[["Snapshot"], T]) -> T:
+        """Return `builder(self)`, building it only once for this snapshot"""
+        with self._derived_lock:
+            if builder not in self._derived:
+                self._derived[builder] = builder(self)
+
+            return self._derived[builder]
+
+
+def _write_snapshot_files(directory: str, collection_event):
+    bundle = crud.snapshot_bundle.get_snapshot_bundle(
+        collection_event.id, format_version=snapshot_files.FORMAT_VERSION
+    )
+    if bundle is not None and snapshot_files.unpack_bundle(
+        directory, collection_event.id, bundle
+    ):
+        return
+
+    logger.info(f"Building snapshot for collection event {collection_event.id}")
+    snapshot_files.write_frames(
+        directory,
+        collection_event.id,
+        collection_event.pull_datetime,
+        build_snapshot_frames(get_latest_video_stats(collection_event.id)),
+    )
 
-df_game_highest_like_rate = obtain_ranked_df(
-    df=df_per_game_stats,
-    rank_by_col="Likes per 1000 Views",
-    columns_shown=["Game", "Likes per 1000 Views", "Video Count"],
-    filter_function=lambda df: df[df["Video Count"] > 4],
-    str_conv_col="Likes per 1000 Views",
-    float_conversion=True,
-)
 
-df_biggest_like_getters = obtain_ranked_df(
-    df=df_per_game_stats,
-    rank_by_col="Average Like Rate Per Video",
-    columns_shown=["Game", "Average Like Rate Per Video", "Video Count"],
-    filter_function=lambda df: df[df["Video Count"] > 4],
-    str_conv_col="Average Like Rate Per Video",
-    float_conversion=True,
-)
+def build_snapshot(collection_event) -> Snapshot:
+    """
+    Map the snapshot files of `collection_event` from `settings.snapshot_dir`.  If no
+    other worker has written them yet, unpack the bundle published by the ETL, or
+    build them from the database if there is none.  Falls back to a snapshot held in
+    process memory if the files can't be written.
+    """
+    directory = settings.snapshot_dir
+    try:
+        with snapshot_files.build_lock(directory, collection_event.id):
+            snapshot_data = snapshot_files.read_frames(directory, collection_event.id)
+            if snapshot_data is None:
+                _write_snapshot_files(directory, collection_event)
+                snapshot_files.remove_other_snapshots(
+                    directory, keep_collection_event_ids=[collection_event.id]
+                )
+                snapshot_data = snapshot_files.read_frames(
+                    directory, collection_event.id
+                )
+    except OSError:
+        logger.exception(f"Can't use snapshot files in {directory}")
+        snapshot_data = (
+            collection_event.pull_datetime,
+            build_snapshot_frames(get_latest_video_stats(collection_event.id)),
+            {},
+        )
+
+    pull_datetime, frames, parts = snapshot_data
+    logger.info(f"Loaded snapshot for collection event {collection_event.id}")
+
+    return Snapshot(
+        collection_event_id=collection_event.id,
+        pull_datetime=pull_datetime,
+        frames=frames,
+        parts=parts,
+    )
 
-monthly = pd.Grouper(key="Publish Date", freq="M")
-df_top_monthly = (
-    df_latest_video_stats.groupby([monthly])["Game"]
-    .value_counts()
-    .rename("Game Count")
-    .to_frame()
-    .groupby(level=0)
-    .head(1)
-    .reset_index()
-    .set_index("Publish Date")
-    .sort_index(ascending=False)
-)
-total_videos_monthly = (
-    df_latest_video_stats.groupby([monthly])["Game"]
-    .count()
-    .rename("Total Videos")
-    .to_frame()
-)
-df_top_monthly = df_top_monthly.join(total_videos_monthly).reset_index()
 
-df_top_monthly["Game"] = df_top_monthly["Game"].apply(
-    lambda x: x if not isinstance(x, np.ndarray) else ", ".join(x)
-)
-df_top_monthly["Publish Date"] = df_top_monthly["Publish Date"].apply(
-    lambda x: x.strftime("%Y %B")
+def build_snapshot_bundle(collection_event) -> bytes:
+    """
+    Build the snapshot of `collection_event` from the database, along with every
+    registered bundle part, and pack it for workers to load instead of building it.
+    """
+    frames = build_snapshot_frames(get_latest_video_stats(collection_event.id))
+    snapshot = Snapshot(
+        collection_event_id=collection_event.id,
+        pull_datetime=collection_event.pull_datetime,
+        frames=frames,
+    )
+    parts = {name: export(snapshot) for name, export in _bundle_exporters.items()}
+
+    with tempfile.TemporaryDirectory() as directory:
+        snapshot_files.write_frames(
+            directory,
+            collection_event.id,
+            collection_event.pull_datetime,
+            frames,
+            parts=parts,
+        )
+        return snapshot_files.pack_bundle(directory, collection_event.id)
+
+
+class SnapshotStore:
+    """
+    Holds the current `Snapshot`.  It is built on first use, then rebuilt in a
+    background thread whenever a newer complete collection event appears.  Readers
+    keep whichever snapshot they got; the new one is swapped in only once it and every
+    registered per-snapshot builder are done.  The tasks of registered warmers then
+    fill caches for it on a pool of background threads.
+    """
+
+    def __init__(self, refresh_seconds: int):
+        self.refresh_seconds = refresh_seconds
+        self._snapshot: Snapshot | None = None
+        self._build_lock = threading.Lock()
+        self._per_snapshot_builders = []
+        self._warmers = []
+        self._warmed = None
+        self._warm_lock = threading.Lock()
+        self._refresh_thread_pid = None
+
+    def register(self, builder: Callable[[Snapshot], T]):
+        self._per_snapshot_builders.append(builder)
+
+    def register_warmer(self, warmer: Callable[[Snapshot], Iterable[Callable]]):
+        self._warmers.append(warmer)
+
+    def get(self) -> Snapshot:
+        self._start_refresh_thread()
+
+        snapshot = self._snapshot
+        if snapshot is None:
+            self.refresh()
+            snapshot = self._snapshot
+        if snapshot is None:
+            # The refresh thread keeps polling until an event is complete
+            raise RuntimeError("No complete collection event to build a snapshot of")
+
+        self._start_warming(snapshot)
+        return snapshot
+
+    def refresh(self) -> bool:
+        """
+        Swap in a snapshot of the latest complete event; False if already current, or
+        if no event is complete yet
+        """
+        with self._build_lock:
+            collection_event = crud.collection_event.get_most_recent_collection_event()
+            if collection_event is None:
+                return False
+
+            current = self._snapshot
+            if current and current.collection_event_id == collection_event.id:
+                return False
+
+            snapshot = build_snapshot(collection_event)
+            for builder in self._per_snapshot_builders:
+                snapshot.get_derived(builder)
+
+            self._snapshot = snapshot
+            return True
+
+    def _start_warming(self, snapshot: Snapshot):
+        # Caches are per process, so each worker warms the snapshot it serves.  Only
+        # done on use: a thread started before a preloaded worker is forked could
+        # leave the worker's copies of its locks held
+        warmed = (os.getpid(), snapshot.collection_event_id)
+        with self._warm_lock:
+            if not self._warmers or self._warmed == warmed:
+                return
+            self._warmed = warmed
+
+        threading.Thread(
+            target=self._warm, args=(snapshot,), name="snapshot-warm", daemon=True
+        ).start()
+
+    def _warm(self, snapshot: Snapshot):
+        started = time.perf_counter()
+        # Tasks run in the order warmers list them, so list the likeliest views first
+        with ThreadPoolExecutor(
+            max_workers=settings.cache_warm_threads, thread_name_prefix="snapshot-warm"
+        ) as executor:
+            futures = []
+            for warmer in self._warmers:
+                try:
+                    for task in warmer(snapshot):
+                        futures.append((warmer, executor.submit(task)))
+                except Exception:
+                    logger.exception(f"Failed to list tasks of {warmer.__qualname__}")
+
+            for warmer, future in futures:
+                if future.exception() is not None:
+                    logger.error(
+                        f"Failed a task of {warmer.__qualname__}",
+                        exc_info=future.exception(),
+                    )
+
+        logger.info(
+            f"Warmed caches of collection event {snapshot.collection_event_id} with "
+            f"{len(futures)} tasks in {time.perf_counter() - started:.1f}s"
+        )
+
+    def _start_refresh_thread(self):
+        # Threads don't survive the fork of a preloaded gunicorn worker, so start one
+        # per process
+        if self._refresh_thread_pid == os.getpid():
+            return
+
+        self._refresh_thread_pid = os.getpid()
+        threading.Thread(
+            target=self._refresh_on_new_events, name="snapshot-refresh", daemon=True
+        ).start()
+
+    def _refresh_on_new_events(self):
+        """
+        Refresh as soon as the ETL notifies that a collection event is complete, and
+        every `refresh_seconds` regardless, in case a notification was missed.  If
+        listening fails, keep polling on that interval and try to listen again.
+        """
+        while True:
+            try:
+                for collection_event_id in listen(
+                    crud.collection_event.COMPLETE_CHANNEL, timeout=self.refresh_seconds
+                ):
+                    if collection_event_id is not None:
+                        logger.info(
+                            f"Notified of complete collection event "
+                            f"{collection_event_id}"
+                        )
+                    self._try_refresh()
+            except Exception:
+                logger.exception("Lost the collection event listener connection")
+                time.sleep(self.refresh_seconds)
+                self._try_refresh()
+
+    def _try_refresh(self):
+        try:
+            if self.refresh():
+                logger.info("Refreshed dashboard snapshot")
+                self._start_warming(self._snapshot)
+        except Exception:
+            logger.exception("Failed to refresh dashboard snapshot")
+
+
+store = SnapshotStore(refresh_seconds=settings.snapshot_refresh_seconds)
+
+
+def current() -> Snapshot:
+    return store.get()
+
+
+_bundle_exporters: Dict[str, Callable[[Snapshot], snapshot_files.BundlePart]] = {}
+
+
+def bundle_part(part_name: str):
+    """
+    Register a function that exports data derived from a snapshot into snapshot
+    bundles, as DataFrames and JSON strings by name.  Workers read it back with
+    `snapshot.bundled(part_name)`.
+    """
+
+    def decorator(export: Callable[[Snapshot], snapshot_files.BundlePart]):
+        _bundle_exporters[part_name] = export
+        return export
+
+    return decorator
+
+
+def per_snapshot(builder: Callable[[Snapshot], T]) -> Callable[[Snapshot], T]:
+    """
+    Register a function of a snapshot to be built along with every new snapshot, so
+    readers never wait on it after a refresh.  Get its value with
+    `snapshot.get_derived(builder)`.
+    """
+    store.register(builder)
+    return builder
+
+
+def warm_after_refresh(warmer: Callable[[Snapshot], Iterable[Callable]]):
+    """
+    Register a function listing tasks that fill caches for a snapshot, most likely
+    needed first.  They run on background threads of each process once the snapshot
+    is in use, so requests are served from the previous caches or computed on demand
+    until they are done.  Tasks calling the `warm` of a `shared_snapshot_cache`
+    function are split between the workers of a host.
+    """
+    store.register_warmer(warmer)
+    return warmer
+
+
+def snapshot_lru_cache(maxsize: int):
+    """
+    Like `functools.lru_cache` for functions whose first argument is a `Snapshot`, but
+    keyed by its collection event id so that cached entries don't keep old snapshots
+    alive.
+    """
+
+    def decorator(function):
+        cache = OrderedDict()
+        lock = threading.Lock()
+
+        @wraps(function)
+        def wrapper(snapshot: Snapshot, *args):
+            key = (snapshot.collection_event_id, *args)
+            with lock:
+                if key in cache:
+                    cache.move_to_end(key)
+                    return cache[key]
+
+            value = function(snapshot, *args)
+            with lock:
+                cache[key] = value
+                if len(cache) > maxsize:
+                    cache.popitem(last=False)
+
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+shared_cache = SharedCache(
+    settings.callback_cache_dir, max_bytes=settings.callback_cache_max_mb * 1024**2
 )
 
-df_top_monthly = df_top_monthly.rename({"Publish Date": "Month"}, axis=1)
 
-logger.info("Done")
+def shared_snapshot_cache(maxsize: int):
+    """
+    Like `snapshot_lru_cache`, for functions returning plain JSON, with entries it
+    doesn't hold looked up in `shared_cache` before being computed.  Results computed
+    by one worker are then reused by every other worker of the host.  Warmers call
+    `function.warm` with the same arguments instead.
+    """
+
+    def decorator(function):
+        name = f"{function.__module__}.{function.__qualname__}"
+
+        def shared_key(args) -> str:
+            return hashlib.sha1(repr((name, args)).encode()).hexdigest()
+
+        @snapshot_lru_cache(maxsize)
+        @wraps(function)
+        def wrapper(snapshot: Snapshot, *args):
+            key = shared_key(args)
+            try:
+                payload = shared_cache.get(snapshot.collection_event_id, key)
+            except OSError:
+                logger.exception(f"Can't read shared cache entry of {name}{args}")
+                payload = None
+            if payload is not None:
+                return json.loads(payload)
+
+            value = function(snapshot, *args)
+            try:
+                shared_cache.put(snapshot.collection_event_id, key, json.dumps(value))
+            except OSError:
+                logger.exception(f"Can't write shared cache entry of {name}{args}")
+
+            return value
+
+        def warm(snapshot: Snapshot, *args):
+            key = shared_key(args)
+            try:
+                claimed = shared_cache.claim(snapshot.collection_event_id, key)
+            except OSError:
+                claimed = True
+            if not claimed:
+                return
+
+            try:
+                wrapper(snapshot, *args)
+            finally:
+                # Already gone once the entry is stored; left behind if computing or
+                # storing it failed, other workers would never fill it
+                try:
+                    shared_cache.release(snapshot.collection_event_id, key)
+                except OSError:
+                    logger.exception(f"Can't release the shared cache claim of {name}")
+
+        # For warmers: computes the entry unless it is stored or another worker is on it
+        wrapper.warm = warm
+        return wrapper
+
+    return decorator
@@ -0,0 +1,78 @@
+import numpy as np
+import plotly.graph_objects as go
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Indices of at most `threshold` points of the series (`x`, `y`) picked with
+    Largest-Triangle-Three-Buckets, which keeps the peaks and dips that shape the
+    line.  `x` must be sorted and numeric.
+    """
+    length = len(x)
+    if threshold >= length or threshold < 3:
+        return np.arange(length)
+
+    # First and last points are always kept; the rest are split into buckets
+    bucket_edges = np.linspace(1, length - 1, threshold - 1).astype(np.int64)
+    picked = np.empty(threshold, dtype=np.int64)
+    picked[0] = 0
+    picked[-1] = length - 1
+
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, stop = bucket_edges[bucket], bucket_edges[bucket + 1]
+        if bucket + 2 < len(bucket_edges):
+            next_stop = bucket_edges[bucket + 2]
+        else:
+            next_stop = length
+        next_x = x[stop:next_stop].mean() if next_stop > stop else x[-1]
+        next_y = y[stop:next_stop].mean() if next_stop > stop else y[-1]
+
+        # Area of the triangle each candidate makes with the previous pick and the
+        # average of the next bucket
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:stop] - y[previous])
+            - (x[previous] - x[start:stop]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        picked[bucket + 1] = previous
+
+    return picked
+
+
+def downsample_figure(figure: go.Figure, max_points: int) -> go.Figure:
+    """
+    Reduce every line or scatter trace of `figure` with more than `max_points` points
+    with `lttb`.  Dates are compared as nanoseconds, and values on a log axis by
+    their logarithm.  A `max_points` of 0 leaves the figure untouched.
+    """
+    if not max_points:
+        return figure
+
+    log_y = figure.layout.yaxis.type == "log"
+    for trace in figure.data:
+        if trace.type not in ("scatter", "scattergl") or trace.x is None:
+            continue
+        if len(trace.x) <= max_points:
+            continue
+
+        x = np.asarray(trace.x)
+        if np.issubdtype(x.dtype, np.datetime64) or x.dtype == object:
+            x = np.asarray(x, dtype="datetime64[ns]")
+        x = x.astype(np.float64)
+        y = np.asarray(trace.y, dtype=np.float64)
+        if log_y:
+            y = np.log10(np.clip(y, 1, None))
+
+        picked = lttb(x, y, max_points)
+        updates = {"x": np.asarray(trace.x)[picked], "y": np.asarray(trace.y)[picked]}
+        # Per-point properties have to keep matching the points left
+        for name in ("customdata", "hovertext", "text", "marker.size", "marker.color"):
+            values = trace
+            for part in name.split("."):
+                values = getattr(values, part, None)
+            if values is not None and not isinstance(values, (str, int, float)):
+                updates[name.replace(".", "_")] = np.asarray(values)[picked]
+        trace.update(updates)
+
+    return figure
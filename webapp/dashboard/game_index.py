@@ -0,0 +1,76 @@
+import re
+from typing import Dict, Iterable, List
+
+import pandas as pd
+
+_WORD_START = re.compile(r"\b\w")
+# Games suggested for a prefix
+SUGGESTION_COUNT = 20
+
+
+class _TrieNode:
+    __slots__ = ("children", "games")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.games: List[str] = []
+
+
+class GameIndex:
+    """
+    Prefix trie over game names for autocomplete.  A name can be found from the start
+    of any of its words, and every node keeps the games with the most videos below
+    it, so suggestions for a prefix are read off one node.
+    """
+
+    def __init__(self, video_counts: pd.Series, size: int = SUGGESTION_COUNT):
+        """`video_counts`: number of videos by game, most first"""
+        self._root = _TrieNode()
+        self._size = size
+
+        # Inserted most videos first, so each node's list fills in ranking order
+        for game in video_counts.index:
+            folded = game.casefold()
+            for word_start in _WORD_START.finditer(folded):
+                node = self._root
+                for character in folded[word_start.start():]:
+                    node = node.children.setdefault(character, _TrieNode())
+                    if len(node.games) < size and game not in node.games:
+                        node.games.append(game)
+
+        self._top = list(video_counts.index[:size])
+
+    def suggest(self, prefix: str | None) -> List[str]:
+        """The games with the most videos among those a word of starts `prefix`"""
+        prefix = (prefix or "").strip().casefold()
+        if not prefix:
+            return self._top
+
+        node = self._root
+        for character in prefix:
+            node = node.children.get(character)
+            if node is None:
+                return []
+
+        return node.games
+
+
+def game_options(
+    games: GameIndex,
+    search_value: str | None,
+    selected: Iterable[str] | None,
+    max_selected: int | None = None,
+) -> List[dict]:
+    """
+    Dropdown options of the games suggested for `search_value`, after the `selected`
+    ones, which must stay options to stay shown.  Once `max_selected` games are
+    selected, the others are disabled.
+    """
+    selected = list(selected or [])
+    full = max_selected is not None and len(selected) >= max_selected
+    options = [{"label": game, "value": game} for game in selected]
+    for game in games.suggest(search_value):
+        if game not in selected:
+            options.append({"label": game, "value": game, "disabled": full})
+
+    return options
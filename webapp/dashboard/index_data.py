@@ -0,0 +1,163 @@
+import pandas as pd
+from pandas.tseries.offsets import DateOffset
+from datetime import date
+
+from . import data
+
+DAILY_PERFORMANCE_DAYS_MAX = 6
+NEW_VIDEO_MIN_DAYS = 2
+SERIES_MIN_VIDEO_COUNT = 2
+SMALL_SERIES_MAX_VIDEO_COUNT = 30
+
+
+class IndexPageData:
+    def __init__(self, snapshot: data.Snapshot):
+        (
+            daily_performance_stats,
+            self.df_new_videos_stats,
+        ) = data.get_daily_performance_stats(
+            snapshot,
+            max_days=DAILY_PERFORMANCE_DAYS_MAX,
+            new_video_min_days=NEW_VIDEO_MIN_DAYS,
+        )
+
+        self.daily_middle_50_x = (
+            daily_performance_stats.index.tolist()
+            + daily_performance_stats.index.tolist()[::-1]
+        )
+        self.daily_middle_50_y = (
+            daily_performance_stats["75%"].tolist()
+            + daily_performance_stats["25%"].tolist()[::-1]
+        )
+
+        self.df_views_over_time = (
+            snapshot.df_latest_video_stats.set_index("Publish Date")[["Views"]]
+            .resample("W")
+            .sum()
+            .reset_index()
+        )
+
+        # Plain string games: Plotly groups by every category, observed or not.  The
+        # videos are already in publish date order
+        df_latest_video_stats = snapshot.videos.df.astype({"Game": str})
+
+        # Get list of game series that are "small"; not many videos
+        counts = df_latest_video_stats["Game"].value_counts().rename("Count").to_frame()
+        small_game_series = counts[
+            (counts["Count"] >= SERIES_MIN_VIDEO_COUNT)
+            & (counts["Count"] <= SMALL_SERIES_MAX_VIDEO_COUNT)
+        ].index.tolist()
+
+        # Get list of game series that are RECENT
+        today = pd.Timestamp(date.today(), tz="US/Eastern")
+        most_recent_pub_date_per_video = (
+            df_latest_video_stats.groupby("Game", observed=True)["Publish Date"]
+            .max()
+            .to_frame()
+        )
+        recent_video_series = most_recent_pub_date_per_video[
+            most_recent_pub_date_per_video["Publish Date"]
+            >= today - DateOffset(weeks=3)
+        ].index.tolist()
+
+        game_series = counts[counts["Count"] >= 2].index.tolist()
+        df_latest_video_stats["Cumulative Views"] = (
+            df_latest_video_stats[df_latest_video_stats["Game"].isin(game_series)]
+            .groupby(["Game"], observed=True)["Views"]
+            .cumsum()
+            .fillna(0)
+            .astype(int)
+        )
+
+        # Create publish rank order for each game series
+        df_game_series_video_stats = df_latest_video_stats[
+            df_latest_video_stats["Game"].isin(game_series)
+        ]
+        df_game_series_video_stats = pd.concat(
+            [
+                df[
+                    [
+                        "Cumulative Views",
+                        "Views",
+                        "Likes",
+                        "Likes per 1000 Views",
+                        "Comments",
+                        "Comments per 1000 Views",
+                        "Publish Date",
+                        "Game",
+                        "Title",
+                    ]
+                ]
+                .reset_index(drop=True)
+                .reset_index()
+                for _, df in df_game_series_video_stats.groupby(
+                    "Game", as_index=False, observed=True
+                )
+            ]
+        )
+
+        df_game_series_video_stats["Video #"] = df_game_series_video_stats["index"] + 1
+
+        self.df_small_game_series_video_stats = df_game_series_video_stats[
+            df_game_series_video_stats["Game"].isin(small_game_series)
+            & df_game_series_video_stats["Game"].isin(recent_video_series)
+        ]
+
+        series_cumulative_views_stats = (
+            df_game_series_video_stats.groupby("Video #")["Cumulative Views"]
+            .describe()
+            .loc[:SMALL_SERIES_MAX_VIDEO_COUNT]
+        )
+
+        self.middle_50_x = (
+            series_cumulative_views_stats.index.tolist()
+            + series_cumulative_views_stats.index.tolist()[::-1]
+        )
+        self.middle_50_y = (
+            series_cumulative_views_stats["75%"].tolist()
+            + series_cumulative_views_stats["25%"].tolist()[::-1]
+        )
+
+    def to_bundle(self) -> dict:
+        return {
+            "df_new_videos_stats": self.df_new_videos_stats,
+            "df_views_over_time": self.df_views_over_time,
+            "df_small_game_series_video_stats": self.df_small_game_series_video_stats,
+            "daily_middle_50": pd.DataFrame(
+                {"x": self.daily_middle_50_x, "y": self.daily_middle_50_y}
+            ),
+            "middle_50": pd.DataFrame({"x": self.middle_50_x, "y": self.middle_50_y}),
+        }
+
+    @classmethod
+    def from_bundle(cls, bundled: dict) -> "IndexPageData":
+        page_data = cls.__new__(cls)
+        page_data.df_new_videos_stats = bundled["df_new_videos_stats"]
+        page_data.df_views_over_time = bundled["df_views_over_time"]
+        page_data.df_small_game_series_video_stats = bundled[
+            "df_small_game_series_video_stats"
+        ]
+        page_data.daily_middle_50_x = bundled["daily_middle_50"]["x"].tolist()
+        page_data.daily_middle_50_y = bundled["daily_middle_50"]["y"].tolist()
+        page_data.middle_50_x = bundled["middle_50"]["x"].tolist()
+        page_data.middle_50_y = bundled["middle_50"]["y"].tolist()
+
+        return page_data
+
+
+@data.per_snapshot
+def build_page_data(snapshot: data.Snapshot) -> IndexPageData:
+    bundled = snapshot.bundled("index_page_data")
+    if bundled is not None:
+        return IndexPageData.from_bundle(bundled)
+
+    return IndexPageData(snapshot)
+
+
+@data.bundle_part("index_page_data")
+def export_page_data(snapshot: data.Snapshot) -> dict:
+    return get_page_data(snapshot).to_bundle()
+
+
+def get_page_data(snapshot: data.Snapshot) -> IndexPageData:
+    return snapshot.get_derived(build_page_data)
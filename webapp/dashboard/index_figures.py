@@ -0,0 +1,149 @@
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io
+
+from . import data, index_data
+from .downsample import downsample_figure
+from config import settings
+
+CHART_HEIGHT = 600
+
+
+def create_views_over_time_chart(df_views_over_time: pd.DataFrame):
+    figure = px.scatter(
+        df_views_over_time,
+        x="Publish Date",
+        y="Views",
+        template="plotly_dark",
+        log_y=True,
+        trendline="rolling",
+        trendline_options=dict(window=10),
+        height=CHART_HEIGHT,
+        render_mode="webgl",
+    )
+
+    figure.update_layout(
+        margin=dict(l=10, r=20, t=20, b=20),
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+    )
+
+    return downsample_figure(figure, settings.chart_max_points)
+
+
+def create_performance_chart(
+    x_axis: str,
+    y_axis: str,
+    line_data: pd.DataFrame,
+    color: str,
+    middle_50_x,
+    middle_50_y,
+):
+    figure = px.line(
+        line_data,
+        x=x_axis,
+        y=y_axis,
+        template="plotly_dark",
+        color=color,
+        log_y=True,
+        markers=True,
+        hover_data=["Title", "Publish Date", "Views"],
+        height=CHART_HEIGHT,
+    )
+    figure.update_layout(
+        transition_duration=1000,
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5),
+        hovermode="x",
+    )
+    figure.add_trace(
+        go.Scatter(
+            x=middle_50_x,
+            y=middle_50_y,
+            fill="toself",
+            fillcolor="rgba(243,215,200,0.3)",
+            line_color="rgba(255,255,255,0)",
+            name="Middle 50%",
+            hoverinfo="none",
+        )
+    )
+
+    return figure
+
+
+class IndexFigures:
+    def __init__(self, snapshot: data.Snapshot):
+        bundled = snapshot.bundled("index_figures")
+        if bundled is not None:
+            self.fig_views_over_time = plotly.io.from_json(
+                bundled["fig_views_over_time"]
+            )
+            self.fig_new_series_trend = plotly.io.from_json(
+                bundled["fig_new_series_trend"]
+            )
+            self.default_figure = plotly.io.from_json(bundled["default_figure"])
+            return
+
+        page_data = index_data.get_page_data(snapshot)
+
+        self.fig_views_over_time = create_views_over_time_chart(
+            page_data.df_views_over_time
+        )
+        self.fig_new_series_trend = create_performance_chart(
+            x_axis="Video #",
+            y_axis="Cumulative Views",
+            line_data=page_data.df_small_game_series_video_stats,
+            color="Game",
+            middle_50_x=page_data.middle_50_x,
+            middle_50_y=page_data.middle_50_y,
+        )
+        self.default_figure = generate_figure(snapshot, tuple(snapshot.most_uploaded))
+
+    def to_bundle(self) -> dict:
+        return {
+            "fig_views_over_time": self.fig_views_over_time.to_json(),
+            "fig_new_series_trend": self.fig_new_series_trend.to_json(),
+            "default_figure": self.default_figure.to_json(),
+        }
+
+
+@data.per_snapshot
+def build_figures(snapshot: data.Snapshot) -> IndexFigures:
+    return IndexFigures(snapshot)
+
+
+@data.bundle_part("index_figures")
+def export_figures(snapshot: data.Snapshot) -> dict:
+    return snapshot.get_derived(build_figures).to_bundle()
+
+
+def generate_figure(snapshot: data.Snapshot, games_selection):
+    filtered_videos = snapshot.videos.query(
+        games=games_selection or snapshot.most_uploaded
+    )
+
+    fig = px.scatter(
+        # Plain string games: Plotly groups by every category, observed or not
+        filtered_videos.astype({"Game": str}),
+        x="Publish Date",
+        y="Views",
+        template="plotly_dark",
+        log_y=True,
+        size="Likes per 1000 Views",
+        color="Game",
+        # trendline="rolling",
+        # trendline_options=dict(window=7),
+        height=CHART_HEIGHT,
+        hover_data=["Title"],
+        category_orders={"Game": games_selection},
+        render_mode="webgl",
+    )
+    fig.update_layout(
+        transition_duration=1000,
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5),
+    )
+    return fig
@@ -0,0 +1,106 @@
+from datetime import date
+from enum import Enum
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+
+from . import data
+
+RANKING_COLUMN = "Ranking"
+
+# Columns shown on leaderboards that are derived from the ranked rows alone
+_DERIVED_COLUMNS = {
+    "Duration": lambda df: df["Duration (Seconds)"].map(data.convert_seconds),
+}
+
+
+class Entity(str, Enum):
+    video = "video"
+    game = "game"
+
+
+class LeaderboardQuery(BaseModel):
+    """
+    The `k` videos or games with the highest `metric`, among the videos published in
+    [`published_from`, `published_before`).  Games with fewer than `min_video_count`
+    videos are left out.
+    """
+
+    metric: str
+    entity: Entity = Entity.video
+    columns: Tuple[str, ...]
+    min_video_count: int = 0
+    published_from: date | None = None
+    published_before: date | None = None
+    k: int = 50
+
+    class Config:
+        # Hashable, so queries can key the leaderboard cache
+        frozen = True
+
+
+def _candidates(snapshot: data.Snapshot, query: LeaderboardQuery) -> pd.DataFrame:
+    if query.entity == Entity.game and (
+        query.published_from is None and query.published_before is None
+    ):
+        df_games = snapshot.df_per_game_stats
+        return df_games[df_games["Video Count"] >= query.min_video_count]
+
+    df_videos = snapshot.videos.take(
+        snapshot.videos.positions(
+            published_from=query.published_from,
+            published_before=query.published_before,
+        )
+    )
+    if query.entity == Entity.video:
+        return df_videos
+
+    df_games = data.get_per_game_stats(df_videos)
+    return df_games[df_games["Video Count"] >= query.min_video_count]
+
+
+def top_k(df: pd.DataFrame, metric: str, k: int) -> pd.DataFrame:
+    """
+    The `k` rows of `df` with the highest `metric`, in order, with their ranking.
+    Tied rows share the best ranking among them.  Only the winning rows are sorted:
+    they are picked out of the rest with a partial selection.
+    """
+    values = df[metric].to_numpy(dtype=np.float64)
+    candidates = np.flatnonzero(~np.isnan(values))
+    if len(candidates) > k:
+        picked = np.argpartition(-values[candidates], k - 1)[:k]
+        # Back in row order, so that ties are broken the same way every time
+        candidates = candidates[np.sort(picked)]
+
+    order = candidates[np.argsort(-values[candidates], kind="stable")]
+    df_top = df.iloc[order]
+    top_values = -values[order]
+
+    return df_top.assign(
+        **{RANKING_COLUMN: np.searchsorted(top_values, top_values, side="left") + 1}
+    )
+
+
+@data.snapshot_lru_cache(maxsize=64)
+def get_leaderboard(
+    snapshot: data.Snapshot, query: LeaderboardQuery
+) -> pd.DataFrame:
+    """
+    Rank the videos or games of `snapshot` for `query`.  Leaderboards are built on
+    first request and cached per snapshot, so adding one costs nothing at startup.
+    """
+    df_top = top_k(_candidates(snapshot, query), metric=query.metric, k=query.k)
+    for column in query.columns:
+        if column in _DERIVED_COLUMNS:
+            df_top = df_top.assign(**{column: _DERIVED_COLUMNS[column](df_top)})
+
+    return df_top[[RANKING_COLUMN, *query.columns]].reset_index(drop=True)
+
+
+def format_columns(df: pd.DataFrame, formats: Dict[str, str]) -> pd.DataFrame:
+    """Format the values of each column in `formats` with its format string"""
+    return df.assign(
+        **{column: df[column].map(fmt.format) for column, fmt in formats.items()}
+    )
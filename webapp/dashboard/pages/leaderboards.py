@@ -1,11 +1,22 @@
 from enum import Enum
-
-from dash import html, callback, Output, Input
+from typing import Dict
+
+from dash import (
+    ClientsideFunction,
+    Input,
+    Output,
+    State,
+    callback,
+    clientside_callback,
+    dcc,
+    html,
+)
 import dash_mantine_components as dmc
 from dash_iconify import DashIconify
 import pandas as pd
 
 from .. import data, util
+from ..leaderboard import Entity, LeaderboardQuery, format_columns, get_leaderboard
 from log import get_logger
 
 logger = get_logger(__name__)
@@ -23,49 +34,95 @@ def make_single_leaderboard(dataframe: pd.DataFrame):
     return html.Div(children=[dmc_table])
 
 
+def ranked_board(formats: Dict[str, str] | None = None, **query):
+    """Board of the top 50 for a `LeaderboardQuery`, with `formats` applied"""
+    query = LeaderboardQuery(**query)
+    return lambda snapshot: format_columns(
+        get_leaderboard(snapshot, query), formats or {}
+    )
+
+
 all_boards = {
     "game_views_overall": {
-        "df": data.df_most_viewed_games.head(n=50),
+        "df": ranked_board(
+            metric="Views",
+            entity=Entity.game,
+            columns=("Game", "Views", "Video Count"),
+            formats={"Views": "{:,d}"},
+        ),
         "label": "Most Viewed Game - Overall",
         "tab": LeaderboardTab.views,
     },
     "game_views_average": {
-        "df": data.df_biggest_view_getters.head(n=50),
+        "df": ranked_board(
+            metric="Average Views Per Video",
+            entity=Entity.game,
+            columns=("Game", "Average Views Per Video", "Video Count"),
+            min_video_count=5,
+            formats={"Average Views Per Video": "{:,d}"},
+        ),
         "label": "Most Viewed Game - On Average",
         "tab": LeaderboardTab.views,
     },
     "video_views_overall": {
-        "df": data.df_most_viewed_videos.head(n=50),
+        "df": ranked_board(
+            metric="Views",
+            columns=("id", "Title", "Publish Date", "Views"),
+            formats={"Views": "{:,d}"},
+        ),
         "label": "Most Viewed Video - Overall",
         "tab": LeaderboardTab.views,
     },
     "game_likes_overall": {
-        "df": data.df_game_highest_like_rate.head(n=50),
+        "df": ranked_board(
+            metric="Likes per 1000 Views",
+            entity=Entity.game,
+            columns=("Game", "Likes per 1000 Views", "Video Count"),
+            min_video_count=5,
+            formats={"Likes per 1000 Views": "{:.02f}"},
+        ),
         "label": "Highest Game Like Rate (Likes per 1000 Views) - Overall",
         "tab": LeaderboardTab.likes,
     },
     "game_likes_average": {
-        "df": data.df_biggest_like_getters.head(n=50),
+        "df": ranked_board(
+            metric="Average Like Rate Per Video",
+            entity=Entity.game,
+            columns=("Game", "Average Like Rate Per Video", "Video Count"),
+            min_video_count=5,
+            formats={"Average Like Rate Per Video": "{:.02f}"},
+        ),
         "label": "Highest Game Like Rate (Likes per 1000 Views) - On Average",
         "tab": LeaderboardTab.likes,
     },
     "video_likes_overall": {
-        "df": data.df_video_highest_like_rate.head(n=50),
+        "df": ranked_board(
+            metric="Likes per 1000 Views",
+            columns=("id", "Title", "Publish Date", "Likes per 1000 Views", "Views"),
+        ),
         "label": "Most Liked Video (per 1000 Views) - Overall",
         "tab": LeaderboardTab.likes,
     },
     "most_published_overall": {
-        "df": data.df_most_published_games.head(n=50),
+        "df": ranked_board(
+            metric="Video Count",
+            entity=Entity.game,
+            columns=("Game", "Video Count"),
+        ),
         "label": "Most Published Game - Overall",
         "tab": LeaderboardTab.activity,
     },
     "most_published_monthly": {
-        "df": data.df_top_monthly,
+        "df": lambda snapshot: snapshot.cube.df_top_monthly,
         "label": "Most Published Game - Monthly",
         "tab": LeaderboardTab.activity,
     },
     "longest_videos_overall": {
-        "df": data.df_longest_videos.head(n=50),
+        "df": ranked_board(
+            metric="Duration (Seconds)",
+            columns=("id", "Title", "Publish Date", "Views", "Duration"),
+            formats={"Views": "{:,d}"},
+        ),
         "label": "Longest Video - Overall",
         "tab": LeaderboardTab.length,
     },
@@ -78,8 +135,6 @@ tab_definitions = {
     LeaderboardTab.length: "bxs:time-five",
 }
 
-tabs = list(tab_definitions.keys())
-
 tab_selections = [
     [
         {"value": key, "label": info["label"]}
@@ -116,24 +171,41 @@ page_content = dmc.Paper(
             color="red",
         ),
         tab_content,
+        d_tab_selections := dcc.Store(
+            id="leaderboards-tab-selections", data=tab_selections
+        ),
     ],
     withBorder=True,
     px="sm",
     py="sm",
 )
 
-layout = html.Div(
-    children=[html.Br(), page_content],
+
+def layout():
+    return html.Div(
+        children=[html.Br(), page_content],
+    )
+
+
+clientside_callback(
+    ClientsideFunction(namespace="nlstats", function_name="switch_tab"),
+    Output(d_select, "data"),
+    Output(d_select, "value"),
+    Input(d_tabs, "active"),
+    State(d_tab_selections, "data"),
 )
 
 
-@callback(Output(d_select, "data"), Output(d_select, "value"), Input(d_tabs, "active"))
-def switch_tab(active_tab: int):
-    logger.info(f"[leaderboards] Go to tab: {tabs[active_tab].value}")
-    return tab_selections[active_tab], tab_selections[active_tab][0]["value"]
+@data.per_snapshot
+def render_boards(snapshot: data.Snapshot) -> Dict[str, dict]:
+    """Every board of `snapshot`, rendered and serialized ahead of its first view"""
+    return {
+        key: util.to_plain_json(make_single_leaderboard(board["df"](snapshot)))
+        for key, board in all_boards.items()
+    }
 
 
 @callback(Output(d_content, "children"), Input(d_select, "value"))
 def switch_views_board(selected_board):
     logger.info(f"[leaderboards] Go to board: {selected_board}")
-    return make_single_leaderboard(all_boards[selected_board]["df"])
+    return data.current().get_derived(render_boards)[selected_board]
@@ -1,20 +1,35 @@
-from typing import List
-from enum import Enum
+from functools import partial
+from typing import List, Tuple
 
 import dash_mantine_components as dmc
 import pandas as pd
 import plotly.express as px
-from dash import Input, Output, State, callback, ctx, dcc, html, no_update
+from dash import (
+    ClientsideFunction,
+    Input,
+    Output,
+    State,
+    callback,
+    clientside_callback,
+    ctx,
+    dcc,
+    html,
+)
 from dash_iconify import DashIconify
 
 import log
 
 from .. import data, util
+from ..game_index import game_options
+from ..video_stats_store import (
+    RELEVANCE,
+    Frequency,
+    SortedSelection,
+    VideoStatsStore,
+)
 
 logger = log.get_logger(__name__)
 
-df_videos = data.df_latest_video_stats.sort_values(by="Publish Date", ascending=False)
-
 
 def create_video_card(video: pd.Series):
     image = dmc.Image(
@@ -56,30 +71,63 @@ def create_video_card(video: pd.Series):
     return paper
 
 
-class Frequency(Enum):
-    by_day = "D"
-    by_week = "W"
-    by_month = "M"
+SORTS = {
+    "Date": "Publish Date",
+    "View Count": "Views",
+    "Like Rate": "Likes per 1000 Views",
+    "Comment Rate": "Comments per 1000 Views",
+    "Relevance": RELEVANCE,
+}
+
+VIDEOS_PER_PAGE = 20
+# Games whose scatter figure is rendered ahead of their first selection
+WARM_GAME_COUNT = 10
+
+
+def create_card_grid(frame: pd.DataFrame):
+    return dmc.SimpleGrid(
+        children=[create_video_card(row) for _, row in frame.iterrows()],
+        cols=4,
+        spacing="md",
+        breakpoints=[
+            {"maxWidth": "xl", "cols": 3},
+            {"maxWidth": "lg", "cols": 2},
+            {"maxWidth": "sm", "cols": 1},
+        ],
+        style={"margin-bottom": "20px"},
+    )
 
 
-def create_cards_from_df(
-    df: pd.DataFrame,
+def select_videos(
+    videos: VideoStatsStore,
+    games: List[str] | None,
+    selected_ids: List[str] | None,
     sort_selection: str,
     sort_ascending: bool,
-    page: int | None,
-    frequency: Frequency = Frequency.by_day,
-):
-    sorts = {
-        "Date": "Publish Date",
-        "View Count": "Views",
-        "Like Rate": "Likes per 1000 Views",
-        "Comment Rate": "Comments per 1000 Views",
-    }
+    frequency: Frequency,
+    search: str | None = None,
+) -> SortedSelection:
+    return videos.sorted_selection(
+        games=tuple(games) if games else None,
+        video_ids=tuple(selected_ids) if selected_ids is not None else None,
+        sort_by=SORTS[sort_selection],
+        ascending=sort_ascending,
+        # Listed by date, pages end with a whole day, week or month
+        frequency=frequency if sort_selection == "Date" else None,
+        search=(search or "").strip() or None,
+    )
 
-    if page is None:
-        page = 0
 
-    VIDEOS_PER_PAGE = 20
+def create_cards(
+    videos: VideoStatsStore,
+    selection: SortedSelection,
+    sort_selection: str,
+    cursor: int | None,
+    frequency: Frequency = Frequency.by_day,
+):
+    """Cards of the page of `selection` at `cursor`, and the cursor of the next page"""
+    if cursor is None:
+        cursor = 0
 
     if frequency == Frequency.by_week:
         pre_text = "Week ending "
@@ -91,31 +139,11 @@ def create_cards_from_df(
         pre_text = ""
         str_format = "%Y-%m-%d"
 
+    page_positions, next_cursor = selection.page(cursor, VIDEOS_PER_PAGE)
+
     output = []
     if sort_selection == "Date":
-
-        def get_frames(df: pd.DataFrame):
-            freq = frequency.value
-            day_grouper = pd.Grouper(key="Publish Date", freq=freq)
-            if sort_ascending:
-                return list(df.groupby(day_grouper, sort=False))
-            else:
-                return reversed(list(df.groupby(day_grouper, sort=False)))
-
-        current_page_count = 0
-        current_skip_count = 0
-        for day, frame in get_frames(df):
-            if frame.empty:
-                continue
-
-            if current_skip_count < (page * VIDEOS_PER_PAGE):
-                current_skip_count += len(frame)
-                current_page_count += len(frame)
-                continue
-
-            frame = frame.sort_values(
-                by=sorts[sort_selection], ascending=sort_ascending
-            )
+        for day, bucket in videos.buckets(page_positions, frequency):
             publish_date: pd.Timestamp = day
             publish_date = publish_date.strftime(str_format)
             publish_text = pre_text + publish_date
@@ -132,50 +160,11 @@ def create_cards_from_df(
                     style={"margin-bottom": "5px"},
                 )
             )
-
-            output.append(
-                dmc.SimpleGrid(
-                    children=[create_video_card(row) for _, row in frame.iterrows()],
-                    cols=4,
-                    spacing="md",
-                    breakpoints=[
-                        {"maxWidth": "xl", "cols": 3},
-                        {"maxWidth": "lg", "cols": 2},
-                        {"maxWidth": "sm", "cols": 1},
-                    ],
-                    style={"margin-bottom": "20px"},
-                )
-            )
-
-            current_page_count += len(frame)
-            if current_page_count >= (VIDEOS_PER_PAGE * (page + 1)):
-                break
-
-        on_last_page = current_page_count >= len(df)
-
+            output.append(create_card_grid(videos.take(bucket)))
     else:
-        skip = page * VIDEOS_PER_PAGE
-        video_count = len(df)
-        df = df.sort_values(by=sorts[sort_selection], ascending=sort_ascending).iloc[
-            skip : skip + 20
-        ]
-        output.append(
-            dmc.SimpleGrid(
-                children=[create_video_card(row) for _, row in df.iterrows()],
-                cols=4,
-                spacing="md",
-                breakpoints=[
-                    {"maxWidth": "xl", "cols": 3},
-                    {"maxWidth": "lg", "cols": 2},
-                    {"maxWidth": "sm", "cols": 1},
-                ],
-                style={"margin-bottom": "20px"},
-            )
-        )
-
-        on_last_page = skip + 20 >= video_count
+        output.append(create_card_grid(videos.take(page_positions)))
 
-    return output, on_last_page
+    return output, next_cursor
 
 
 modal = dmc.Modal(
@@ -239,78 +228,101 @@ def create_skeleton_card():
     )
 
 
-layout = dmc.Stack(
-    [
-        modal,
-        dmc.Center(dmc.Title("Northernlion Library", order=1)),
-        dmc.Center(
+def make_game_selector():
+    # Only the suggestions for what is typed are sent, never every game
+    return dcc.Dropdown(
+        options=game_options(data.current().game_index, None, None),
+        multi=True,
+        id="game-select",
+        className="game-dropdown",
+        style={"width": 500},
+        placeholder="Search games...",
+    )
+
+
+d_search = dmc.TextInput(
+    icon=[DashIconify(icon="cil:magnifying-glass")],
+    size="md",
+    id="library-search",
+    style={"width": 500},
+    placeholder="Search titles...",
+)
+
+
+page_controls = [
+    dmc.Group(
+        children=[
+            dmc.Group(
+                [
+                    d_result_count := dmc.Text(),
+                    d_open_modal := dmc.Button("Select Filter"),
+                ],
+                position="left",
+            ),
+            dmc.Group(
+                [
+                    dmc.Text("Sort:"),
+                    d_sort_selection := dmc.Select(
+                        data=list(SORTS),
+                        value="Date",
+                    ),
+                    d_sort_direction := dmc.ActionIcon(
+                        DashIconify(icon="akar-icons:arrow-down-thick"),
+                        color="blue",
+                        variant="hover",
+                    ),
+                ],
+                position="right",
+                spacing="xs",
+            ),
+        ],
+        position="apart",
+        align="flex-start",
+    ),
+    dmc.LoadingOverlay(
+        html.Div(
             [
-                d_game_selector := dmc.MultiSelect(
-                    icon=[DashIconify(icon="cil:magnifying-glass")],
-                    data=data.all_games.index.to_list(),
-                    searchable=True,
-                    nothingFound="No games found",
-                    size="xl",
-                    id="game-select",
-                    style={"width": 500},
-                    placeholder="Search games...",
-                ),
-            ],
-        ),
-        dmc.Group(
-            children=[
-                dmc.Group(
-                    [
-                        d_result_count := dmc.Text(),
-                        d_open_modal := dmc.Button("Select Filter"),
-                    ],
-                    position="left",
+                d_content := html.Div(
+                    dmc.SimpleGrid(
+                        children=[create_skeleton_card() for _ in range(10)],
+                        cols=4,
+                        spacing="md",
+                        breakpoints=[
+                            {"maxWidth": "xl", "cols": 3},
+                            {"maxWidth": "lg", "cols": 2},
+                            {"maxWidth": "sm", "cols": 1},
+                        ],
+                        style={"margin-bottom": "20px"},
+                    )
                 ),
-                dmc.Group(
-                    [
-                        dmc.Text("Sort:"),
-                        d_sort_selection := dmc.Select(
-                            data=["Date", "View Count", "Like Rate", "Comment Rate"],
-                            value="Date",
-                        ),
-                        d_sort_direction := dmc.ActionIcon(
-                            DashIconify(icon="akar-icons:arrow-down-thick"),
-                            color="blue",
-                            variant="hover",
-                        ),
-                    ],
-                    position="right",
-                    spacing="xs",
-                ),
-            ],
-            position="apart",
-            align="flex-start",
-        ),
-        dmc.LoadingOverlay(
-            d_content := html.Div(
-                dmc.SimpleGrid(
-                    children=[create_skeleton_card() for _ in range(10)],
-                    cols=4,
-                    spacing="md",
-                    breakpoints=[
-                        {"maxWidth": "xl", "cols": 3},
-                        {"maxWidth": "lg", "cols": 2},
-                        {"maxWidth": "sm", "cols": 1},
-                    ],
-                    style={"margin-bottom": "20px"},
-                )
-            ),
-            loaderProps={"variant": "dots", "color": "red", "size": "xl"},
-            style={"align-items": "start"},
-            zIndex=1,
-        ),
-        dmc.Center(
-            d_load_button := dmc.Button(
-                "Load more...", id="load-button", variant="outline"
-            )
+                # The last page of cards, which the browser adds to `d_content`
+                d_page := dcc.Store(id="library-page"),
+            ]
         ),
-    ]
-)
+        loaderProps={"variant": "dots", "color": "red", "size": "xl"},
+        style={"align-items": "start"},
+        zIndex=1,
+    ),
+    dmc.Center(
+        d_load_button := dmc.Button(
+            "Load more...", id="load-button", variant="outline"
+        )
+    ),
+    # Index of the first video of the selection that isn't listed yet
+    d_cursor := dcc.Store(id="library-cursor", data=0),
+]
+
+
+def layout():
+    return dmc.Stack(
+        [
+            modal,
+            dmc.Center(dmc.Title("Northernlion Library", order=1)),
+            dmc.Center([make_game_selector()]),
+            dmc.Center([d_search]),
+        ]
+        + page_controls
+    )
 
 
 def get_youtube_ids_from_graph_selection(selected_data):
@@ -328,6 +340,7 @@ def generate_views_scatter_figure(df: pd.DataFrame):
         height=500,
         hover_data=["Title", "Game"],
         custom_data=["id"],
+        render_mode="webgl",
     )
     fig.update_layout(
         transition_duration=1000,
@@ -339,21 +352,50 @@ def generate_views_scatter_figure(df: pd.DataFrame):
     return fig
 
 
+@data.shared_snapshot_cache(maxsize=32)
+def views_scatter_figure(snapshot: data.Snapshot, games: Tuple[str, ...] | None):
+    # Every video stays in the figure, as each one can be selected
+    videos = snapshot.videos
+    return util.to_plain_json(
+        generate_views_scatter_figure(videos.take(videos.positions(games=games)))
+    )
+
+
+@data.warm_after_refresh
+def warm_views_scatter(snapshot: data.Snapshot):
+    # Every game, then the games with the most videos on their own
+    return [partial(views_scatter_figure.warm, snapshot, None)] + [
+        partial(views_scatter_figure.warm, snapshot, (game,))
+        for game in snapshot.all_games.index[:WARM_GAME_COUNT]
+    ]
+
+
+@callback(
+    Output("game-select", "options"),
+    Input("game-select", "search_value"),
+    State("game-select", "value"),
+    prevent_initial_call=True,
+)
+def suggest_games(search_value: str | None, games: List[str] | None):
+    return game_options(data.current().game_index, search_value, games)
+
+
 def selection_is_empty(selected_data):
     return selected_data is None or not selected_data["points"]
 
 
 @callback(
-    Output(d_content, "children"),
-    Output(d_load_button, "n_clicks"),
+    Output(d_page, "data"),
+    Output(d_cursor, "data"),
     Output(d_result_count, "children"),
     Output(d_load_button, "disabled"),
     Input(d_load_button, "n_clicks"),
-    Input(d_game_selector, "value"),
+    Input("game-select", "value"),
     Input(d_sort_direction, "n_clicks"),
     Input(d_sort_selection, "value"),
     Input(d_views_scatter, "selectedData"),
-    State(d_content, "children"),
+    Input(d_search, "value"),
+    State(d_cursor, "data"),
 )
 def load_more_videos(
     n_clicks_load_more: int,
@@ -361,129 +403,106 @@ def load_more_videos(
     n_clicks_sort_direction: int,
     sort_selection: str,
     selected_data,
-    old_output,
+    search: str | None,
+    cursor: int | None,
 ):
     if n_clicks_sort_direction is None:
         n_clicks_sort_direction = 0
 
     selection_empty = selection_is_empty(selected_data)
     logger.info(
-        f"[Library] Load More Videos -- {n_clicks_load_more=}, {games=}, "
-        f"{sort_selection=}"
+        f"[Library] Load More Videos -- {n_clicks_load_more=}, {cursor=}, {games=}, "
+        f"{sort_selection=}, {search=}"
     )
     if games:
-        df_selected = df_videos[df_videos["Game"].isin(games)]
         freq = Frequency.by_week
     else:
-        df_selected = df_videos
         freq = Frequency.by_day
 
+    selected_ids = None
     if not selection_empty:
         selected_ids = get_youtube_ids_from_graph_selection(selected_data)
-        df_selected = df_selected[df_selected["id"].isin(selected_ids)]
         freq = Frequency.by_month
 
-    num_videos = len(df_selected)
-    if ctx.triggered_id == "load-button":
-        new_cards, paged_thru_all_videos = create_cards_from_df(
-            df=df_selected,
-            sort_selection=sort_selection,
-            sort_ascending=n_clicks_sort_direction % 2 == 1,
-            page=n_clicks_load_more,
-            frequency=freq,
-        )
+    videos = data.current().videos
+    selection = select_videos(
+        videos,
+        games=games,
+        selected_ids=selected_ids,
+        sort_selection=sort_selection,
+        sort_ascending=n_clicks_sort_direction % 2 == 1,
+        frequency=freq,
+        search=search,
+    )
 
-        if old_output is None:
-            old_output = []
+    # Any other input starts the list over
+    load_more = ctx.triggered_id == "load-button"
+    new_cards, next_cursor = create_cards(
+        videos=videos,
+        selection=selection,
+        sort_selection=sort_selection,
+        cursor=cursor if load_more else 0,
+        frequency=freq,
+    )
+
+    return (
+        {"cards": new_cards, "replace": not load_more},
+        next_cursor,
+        f"{len(selection)} Videos",
+        next_cursor >= len(selection),
+    )
 
-        return (
-            old_output + new_cards,
-            no_update,
-            f"{num_videos} Videos",
-            paged_thru_all_videos,
-        )
-    else:
-        new_cards, paged_thru_all_videos = create_cards_from_df(
-            df=df_selected,
-            sort_selection=sort_selection,
-            sort_ascending=n_clicks_sort_direction % 2 == 1,
-            page=0,
-            frequency=freq,
-        )
-        return (
-            new_cards,
-            0,
-            f"{num_videos} Videos",
-            paged_thru_all_videos,
-        )
+
+clientside_callback(
+    ClientsideFunction(namespace="nlstats", function_name="append_cards"),
+    Output(d_content, "children"),
+    Input(d_page, "data"),
+    State(d_content, "children"),
+)
 
 
 @callback(
     Output(d_views_scatter, "figure"),
     Output(d_views_scatter, "style"),
     Output(d_graph_skeleton, "style"),
-    Input(d_game_selector, "value"),
+    Input("game-select", "value"),
     Input(d_clear_selection, "n_clicks"),
 )
 def update_views_scatter(games: List[str], clear_n_clicks):
     logger.info(f"[Library] Update views scatter -- {games=}")
-    if games:
-        df_selected = df_videos[df_videos["Game"].isin(games)]
-    else:
-        df_selected = df_videos
-
-    figure = generate_views_scatter_figure(df_selected)
+    figure = views_scatter_figure(data.current(), tuple(games) if games else None)
 
     return figure, {}, {"display": "none"}
 
 
-@callback(
+clientside_callback(
+    ClientsideFunction(namespace="nlstats", function_name="clear_selection_data"),
     Output(d_views_scatter, "selectedData"),
-    Input(d_game_selector, "value"),
+    Input("game-select", "value"),
     Input(d_clear_selection, "n_clicks"),
 )
-def clear_selection_data(games: List[str], clear_n_clicks):
-    logger.info("[Library] Clear scatter selection")
-
-    return None
 
-
-@callback(
+clientside_callback(
+    ClientsideFunction(namespace="nlstats", function_name="toggle_modal"),
     Output(modal, "opened"),
     Input(d_open_modal, "n_clicks"),
     Input(d_submit_selection, "n_clicks"),
     State(modal, "opened"),
     prevent_initial_call=True,
 )
-def toggle_modal(n_open, n_submit, opened):
-    return not opened
-
 
-@callback(
+clientside_callback(
+    ClientsideFunction(
+        namespace="nlstats", function_name="enable_clear_selection_button"
+    ),
     Output(d_clear_selection, "disabled"),
     Output(d_open_modal, "variant"),
     Output(d_open_modal, "leftIcon"),
     Input(d_views_scatter, "selectedData"),
 )
-def enable_clear_selection_button(selected_data):
-    logger.info("[Library] clear button")
-
-    if selection_is_empty(selected_data):
-        variant = "outline"
-        icon = None
-    else:
-        variant = "filled"
-        icon = DashIconify(icon="ci:filter")
 
-    return selection_is_empty(selected_data), variant, icon
-
-
-@callback(Output(d_sort_direction, "children"), Input(d_sort_direction, "n_clicks"))
-def toggle_sort_arrow(n_clicks):
-    if n_clicks is None:
-        n_clicks = 0
-
-    if n_clicks % 2 == 0:
-        return DashIconify(icon="akar-icons:arrow-down-thick")
-    else:
-        return DashIconify(icon="akar-icons:arrow-up-thick")
+clientside_callback(
+    ClientsideFunction(namespace="nlstats", function_name="toggle_sort_arrow"),
+    Output(d_sort_direction, "children"),
+    Input(d_sort_direction, "n_clicks"),
+)
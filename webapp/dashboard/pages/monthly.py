@@ -1,9 +1,17 @@
 from datetime import date, timedelta
+from functools import partial
 
 import dash_mantine_components as dmc
 import pandas as pd
 import plotly.express as px
-from dash import Input, Output, callback, ctx, dcc, no_update
+from dash import (
+    ClientsideFunction,
+    Input,
+    Output,
+    callback,
+    clientside_callback,
+    dcc,
+)
 from dash_iconify import DashIconify
 
 from .. import data, util
@@ -59,14 +67,14 @@ def create_stat_card(
     )
 
 
-def get_content(date_picked: date):
-    df = data.df_latest_video_stats[
-        (data.df_latest_video_stats["Publish Date"].dt.month == date_picked.month)
-        & (data.df_latest_video_stats["Publish Date"].dt.year == date_picked.year)
-    ]
+def get_content(snapshot: data.Snapshot, date_picked: date):
+    videos = snapshot.videos
+    month_positions = videos.positions(month=date_picked)
+    df_month = snapshot.cube.month(date_picked)
 
     by_game_accordion = []
-    for game, game_df in df.groupby("Game"):
+    for game in df_month["Game"]:
+        game_df = videos.query(games=[game], month=date_picked)
         accordion = dmc.AccordionItem(
             label=game,
             children=[
@@ -92,26 +100,18 @@ def get_content(date_picked: date):
         iconPosition="right",
     )
 
-    most_viewed_video = df.sort_values(by="Views", ascending=False).iloc[0]
-    most_liked_video = df.sort_values(by="Likes per 1000 Views", ascending=False).iloc[
-        0
-    ]
-    most_discussed_video = df.sort_values(
-        by="Comments per 1000 Views", ascending=False
-    ).iloc[0]
+    most_viewed_video = videos.top(month_positions, by="Views")
+    most_liked_video = videos.top(month_positions, by="Likes per 1000 Views")
+    most_discussed_video = videos.top(month_positions, by="Comments per 1000 Views")
 
     # PIE
-    df_game_count = (
-        df.groupby("Game")["Title"]
-        .count()
-        .to_frame()
-        .reset_index()
-        .rename({"Title": "Count"}, axis=1)
-    )
+    df_game_count = df_month[["Game", "Count"]]
     top_games = (
         df_game_count.sort_values(by="Count", ascending=False).iloc[:4]["Game"].tolist()
     )
-    df_game_count.loc[df_game_count["Count"] == 1, "Game"] = "'Other' Games"
+    df_game_count = df_game_count.assign(
+        Game=df_game_count["Game"].mask(df_game_count["Count"] == 1, "'Other' Games")
+    )
 
     pie_game_count = px.pie(
         df_game_count,
@@ -127,17 +127,16 @@ def get_content(date_picked: date):
     )
 
     # Posts
-    date_grouper = pd.Grouper(key="Publish Date", freq="1D")
-    df.loc[~df["Game"].isin(top_games), "Game"] = "'Other' Games"
+    df_days = snapshot.cube.days_of_month(date_picked)
+    df_days["Game"] = df_days["Game"].mask(
+        ~df_days["Game"].isin(top_games), "'Other' Games"
+    )
     df_post_history = (
-        df.groupby([date_grouper, "Game"])
-        .count()["Title"]
-        .to_frame()
-        # .cumsum()
+        df_days.groupby(["Date", "Game"])["Count"]
+        .sum()
         .reset_index()
-        .rename({"Publish Date": "Date", "Title": "Count"}, axis=1)
+        .sort_values(by="Game", kind="stable")
     )
-    df_post_history = df_post_history.sort_values(by="Game")
 
     bar_post_history = px.bar(
         df_post_history,
@@ -204,21 +203,24 @@ def get_content(date_picked: date):
         children=[most_viewed_card, most_liked_card, most_discussed_card],
     )
 
+    comments_per_1000_views = df_month["Comments"].sum() / (
+        df_month["Views"].sum() / 1000
+    )
     stat_column = dmc.SimpleGrid(
         [
             create_stat_card(
                 title="Videos Published",
-                stat_num=str(len(df)),
+                stat_num=str(df_month["Count"].sum()),
                 icon="material-symbols:youtube-activity",
             ),
             create_stat_card(
                 title="Total Views",
-                stat_num=f'{df["Views"].sum():,}',
+                stat_num=f'{df_month["Views"].sum():,}',
                 icon="akar-icons:eye",
             ),
             create_stat_card(
                 title="Comments per 1000 Views",
-                stat_num=f'{df["Comments"].sum() / (df["Views"].sum() / 1000):.04}',
+                stat_num=f"{comments_per_1000_views:.04}",
                 icon="bx:comment-detail",
             ),
         ],
@@ -253,53 +255,80 @@ def get_content(date_picked: date):
     )
 
 
+@data.shared_snapshot_cache(maxsize=256)
+def render_content(snapshot: data.Snapshot, year: int, month: int) -> dict:
+    """
+    The monthly report of `snapshot` for a month, serialized the way Dash sends it,
+    so that revisiting a month neither rebuilds nor re-validates its components
+    """
+    return util.to_plain_json(get_content(snapshot, date(year, month, 1)))
+
+
+@data.warm_after_refresh
+def warm_monthly_reports(snapshot: data.Snapshot):
+    # Most recent first, as those are the months most often looked at
+    return [
+        partial(render_content.warm, snapshot, month.year, month.month)
+        for month in reversed(snapshot.cube.months())
+    ]
+
+
 min_date = date.fromisoformat(config.settings.start_date)
 if min_date.day == 1:
     min_date = min_date + timedelta(days=1)
 
 
-month_nav = dmc.Group(
-    [
-        d_previous_month := dmc.Button(
-            children="",
-            leftIcon=[DashIconify(icon="akar-icons:arrow-left-thick")],
-            id="prev-month-btn",
-        ),
-        d_date_picker := dmc.DatePicker(
-            value=date.today(),
-            inputFormat="MMMM YYYY",
-            initialLevel="month",
-            style={"text-align": "center"},
-            allowLevelChange=False,
-            shadow="md",
-            maxDate=date.today(),
-            minDate=min_date,
-            icon=[DashIconify(icon="clarity:date-line")],
-        ),
-        d_next_month := dmc.Button(
-            children="",
-            rightIcon=[DashIconify(icon="akar-icons:arrow-right-thick")],
-            id="next-month-btn",
-        ),
-    ],
-    position="center",
+d_previous_month = dmc.Button(
+    children="",
+    leftIcon=[DashIconify(icon="akar-icons:arrow-left-thick")],
+    id="prev-month-btn",
 )
+d_next_month = dmc.Button(
+    children="",
+    rightIcon=[DashIconify(icon="akar-icons:arrow-right-thick")],
+    id="next-month-btn",
+)
+d_current_month = dmc.Title("", order=2)
+d_content = dmc.LoadingOverlay()
+
+
+def make_date_picker():
+    # Built per page load so that "today" moves along with a long-running server
+    return dmc.DatePicker(
+        id="monthly-date-picker",
+        value=date.today(),
+        inputFormat="MMMM YYYY",
+        initialLevel="month",
+        style={"text-align": "center"},
+        allowLevelChange=False,
+        shadow="md",
+        maxDate=date.today(),
+        minDate=min_date,
+        icon=[DashIconify(icon="clarity:date-line")],
+    )
+
+
+def layout():
+    month_nav = dmc.Group(
+        [d_previous_month, make_date_picker(), d_next_month],
+        position="center",
+    )
 
-layout = dmc.Stack(
-    children=[
-        dmc.Center(dmc.Title("Monthly Report", order=1)),
-        dmc.Container(
-            dmc.Paper(
-                children=month_nav,
-                p="sm",
-                radius="md",
+    return dmc.Stack(
+        children=[
+            dmc.Center(dmc.Title("Monthly Report", order=1)),
+            dmc.Container(
+                dmc.Paper(
+                    children=month_nav,
+                    p="sm",
+                    radius="md",
+                ),
+                size="md",
             ),
-            size="md",
-        ),
-        dmc.Center(d_current_month := dmc.Title("", order=2)),
-        d_content := dmc.LoadingOverlay(),
-    ],
-)
+            dmc.Center(d_current_month),
+            d_content,
+        ],
+    )
 
 
 @callback(
@@ -309,7 +338,7 @@ layout = dmc.Stack(
     Output(d_previous_month, "disabled"),
     Output(d_next_month, "children"),
     Output(d_next_month, "disabled"),
-    Input(d_date_picker, "value"),
+    Input("monthly-date-picker", "value"),
 )
 def update_content(date_value):
     logger.info(f"[monthly] Update monthly page with date {date_value}")
@@ -330,7 +359,7 @@ def update_content(date_value):
         ) or next_month.year > today.year
 
         return (
-            get_content(date_object),
+            render_content(data.current(), date_object.year, date_object.month),
             date_object.strftime("%B %Y"),
             previous_month.strftime("%B %Y"),
             prev_month_invalid,
@@ -341,24 +370,12 @@ def update_content(date_value):
         return "Pick a date", "", "", ""
 
 
-@callback(
-    Output(d_date_picker, "value"),
+clientside_callback(
+    ClientsideFunction(
+        namespace="nlstats", function_name="update_calendar_from_button"
+    ),
+    Output("monthly-date-picker", "value"),
     Input(d_next_month, "n_clicks"),
     Input(d_previous_month, "n_clicks"),
-    Input(d_date_picker, "value"),
+    Input("monthly-date-picker", "value"),
 )
-def update_calendar_from_button(n_clicks_next, n_clicks_prev, date_value):
-    if date_value is not None:
-        date_object = date.fromisoformat(date_value)
-        if ctx.triggered_id == "next-month-btn":
-            new_date: date = (date_object + pd.DateOffset(months=1)).date()
-            logger.info(f"[monthly] Next month button - {new_date}")
-        elif ctx.triggered_id == "prev-month-btn":
-            new_date: date = (date_object - pd.DateOffset(months=1)).date()
-            logger.info(f"[monthly] Previous month button - {new_date}")
-        else:
-            new_date = date_value
-
-        return new_date
-    else:
-        return no_update
@@ -0,0 +1,119 @@
+import os
+import shutil
+import tempfile
+
+from log import get_logger
+
+logger = get_logger(__name__)
+
+_EVENT_PREFIX = "event_"
+_CLAIM_SUFFIX = ".claim"
+
+
+class SharedCache:
+    """
+    Serialized results shared by every worker of a host, as one file per key under a
+    directory per collection event.  Entries of older events are dropped once results
+    of a newer one are stored, and the least recently used entries once the files
+    take more than `max_bytes`.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def _event_path(self, collection_event_id: int) -> str:
+        return os.path.join(self.directory, f"{_EVENT_PREFIX}{collection_event_id}")
+
+    def _event_directory(self, collection_event_id: int) -> str:
+        event_path = self._event_path(collection_event_id)
+        if not os.path.isdir(event_path):
+            os.makedirs(event_path, exist_ok=True)
+            self._drop_older_events(collection_event_id)
+
+        return event_path
+
+    def get(self, collection_event_id: int, key: str) -> str | None:
+        path = os.path.join(self._event_path(collection_event_id), key)
+        try:
+            with open(path) as cache_file:
+                payload = cache_file.read()
+            # Modification times order entries for eviction
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+
+        return payload
+
+    def claim(self, collection_event_id: int, key: str) -> bool:
+        """
+        True for the first caller only, unless the entry is already stored, so that
+        workers filling the cache ahead of requests split the work between them
+        """
+        path = os.path.join(self._event_directory(collection_event_id), key)
+        if os.path.exists(path):
+            return False
+        try:
+            flags = os.O_CREAT | os.O_EXCL | os.O_WRONLY
+            os.close(os.open(path + _CLAIM_SUFFIX, flags))
+        except FileExistsError:
+            return False
+
+        return True
+
+    def release(self, collection_event_id: int, key: str):
+        """Give up a claim, so another worker can fill the entry"""
+        path = os.path.join(self._event_path(collection_event_id), key)
+        try:
+            os.remove(path + _CLAIM_SUFFIX)
+        except FileNotFoundError:
+            pass
+
+    def put(self, collection_event_id: int, key: str, payload: str):
+        event_path = self._event_directory(collection_event_id)
+        path = os.path.join(event_path, key)
+
+        # Written aside then renamed into place, so readers never see part of a file
+        file_descriptor, temp_path = tempfile.mkstemp(dir=event_path, prefix=".")
+        with os.fdopen(file_descriptor, "w") as cache_file:
+            cache_file.write(payload)
+        os.replace(temp_path, path)
+        self.release(collection_event_id, key)
+
+        self._evict()
+
+    def _drop_older_events(self, collection_event_id: int):
+        # Workers still on an older snapshot may store into its directory after this
+        # ran; it is dropped along with the next newer event
+        for entry in os.scandir(self.directory):
+            if not entry.name.startswith(_EVENT_PREFIX):
+                continue
+            if int(entry.name[len(_EVENT_PREFIX):]) < collection_event_id:
+                shutil.rmtree(entry.path, ignore_errors=True)
+                logger.debug(f"Dropped shared cache entries in {entry.path}")
+
+    def _evict(self):
+        entries = []
+        for event_entry in os.scandir(self.directory):
+            if not event_entry.is_dir():
+                continue
+            for entry in os.scandir(event_entry.path):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        if total_bytes <= self.max_bytes:
+            return
+
+        entries.sort()
+        for _, size, path in entries:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
+            if total_bytes <= self.max_bytes:
+                break
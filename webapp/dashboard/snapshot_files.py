@@ -0,0 +1,245 @@
+import fcntl
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Tuple
+
+import pandas as pd
+import pyarrow as pa
+
+from log import get_logger
+
+logger = get_logger(__name__)
+
+META_FILE = "meta.json"
+PARTS_DIR = "parts"
+
+# Bump whenever the files of a snapshot change shape, so that bundles published by
+# an older ETL are ignored instead of misread
+FORMAT_VERSION = 4
+
+# Snapshot files being written, renamed into place once complete
+_BUILDING_PREFIX = ".building_"
+_LOCK_SUFFIX = ".lock"
+
+# Per-snapshot data other than the frames: DataFrames and JSON strings by name
+BundlePart = Dict[str, pd.DataFrame | str]
+
+
+def _snapshot_path(directory: str, collection_event_id: int) -> str:
+    return os.path.join(directory, f"event_{collection_event_id}")
+
+
+def _lock_path(directory: str, collection_event_id: int) -> str:
+    return _snapshot_path(directory, collection_event_id) + _LOCK_SUFFIX
+
+
+def _pandas_type(arrow_type: pa.DataType):
+    # Keep strings in the mapped Arrow buffers instead of copying them into objects
+    if arrow_type == pa.string():
+        return pd.StringDtype("pyarrow")
+
+    return None
+
+
+@contextmanager
+def build_lock(directory: str, collection_event_id: int):
+    """
+    Exclusive across processes, so only one worker builds the files of a snapshot
+    while the others wait to map them.
+    """
+    os.makedirs(directory, exist_ok=True)
+    with open(_lock_path(directory, collection_event_id), "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _write_arrow_file(path: str, df: pd.DataFrame):
+    table = pa.Table.from_pandas(df)
+    with pa.OSFile(path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def _read_arrow_file(path: str) -> pd.DataFrame:
+    with pa.memory_map(path) as source:
+        table = pa.ipc.open_file(source).read_all()
+
+    return table.to_pandas(split_blocks=True, types_mapper=_pandas_type)
+
+
+def _write_part(path: str, part: BundlePart):
+    os.makedirs(path)
+    for name, value in part.items():
+        if isinstance(value, pd.DataFrame):
+            _write_arrow_file(os.path.join(path, f"{name}.arrow"), value)
+        else:
+            with open(os.path.join(path, f"{name}.json"), "w") as json_file:
+                json_file.write(value)
+
+
+def _read_part(path: str) -> BundlePart:
+    part = {}
+    for file_name in os.listdir(path):
+        name, extension = os.path.splitext(file_name)
+        if extension == ".arrow":
+            part[name] = _read_arrow_file(os.path.join(path, file_name))
+        elif extension == ".json":
+            with open(os.path.join(path, file_name)) as json_file:
+                part[name] = json_file.read()
+
+    return part
+
+
+def _publish(temp_path: str, directory: str, collection_event_id: int):
+    os.rename(temp_path, _snapshot_path(directory, collection_event_id))
+
+
+def write_frames(
+    directory: str,
+    collection_event_id: int,
+    pull_datetime: datetime,
+    frames: Dict[str, pd.DataFrame],
+    parts: Dict[str, BundlePart] | None = None,
+):
+    """
+    Write each frame to an uncompressed Arrow IPC file, along with any `parts`.  The
+    files are written to a temporary directory that is renamed into place, so
+    readers never see a partially written snapshot.
+    """
+    os.makedirs(directory, exist_ok=True)
+    temp_path = tempfile.mkdtemp(dir=directory, prefix=_BUILDING_PREFIX)
+
+    try:
+        for name, df in frames.items():
+            _write_arrow_file(os.path.join(temp_path, f"{name}.arrow"), df)
+
+        for part_name, part in (parts or {}).items():
+            _write_part(os.path.join(temp_path, PARTS_DIR, part_name), part)
+
+        meta = {
+            "format_version": FORMAT_VERSION,
+            "collection_event_id": collection_event_id,
+            "pull_datetime": pull_datetime.isoformat(),
+        }
+        with open(os.path.join(temp_path, META_FILE), "w") as meta_file:
+            json.dump(meta, meta_file)
+
+        _publish(temp_path, directory, collection_event_id)
+    except BaseException:
+        # Partial files are skipped by `remove_other_snapshots`, so nothing else
+        # would remove them; on a full disk each retry would add more
+        shutil.rmtree(temp_path, ignore_errors=True)
+        raise
+    logger.info(f"Wrote snapshot files of collection event {collection_event_id}")
+
+
+def read_frames(
+    directory: str, collection_event_id: int
+) -> Tuple[datetime, Dict[str, pd.DataFrame], Dict[str, BundlePart]] | None:
+    """
+    Memory-map the snapshot files of `collection_event_id`, or None if there are
+    none or they were written in an older format, in which case they are removed.
+    Strings and numbers without nulls reference the mapped pages, which the OS shares
+    between every process that maps the same files.
+
+    Returns the pull datetime, the frames and the parts of the snapshot.
+    """
+    path = _snapshot_path(directory, collection_event_id)
+    if not os.path.isdir(path):
+        return None
+
+    with open(os.path.join(path, META_FILE)) as meta_file:
+        meta = json.load(meta_file)
+    if meta.get("format_version") != FORMAT_VERSION:
+        logger.info(f"Removing snapshot files with metadata {meta}")
+        shutil.rmtree(path)
+        return None
+
+    pull_datetime = datetime.fromisoformat(meta["pull_datetime"])
+
+    frames = {}
+    for file_name in os.listdir(path):
+        name, extension = os.path.splitext(file_name)
+        if extension == ".arrow":
+            frames[name] = _read_arrow_file(os.path.join(path, file_name))
+
+    parts = {}
+    parts_path = os.path.join(path, PARTS_DIR)
+    if os.path.isdir(parts_path):
+        for part_name in os.listdir(parts_path):
+            parts[part_name] = _read_part(os.path.join(parts_path, part_name))
+
+    return pull_datetime, frames, parts
+
+
+def pack_bundle(directory: str, collection_event_id: int) -> bytes:
+    """Zip the snapshot files of `collection_event_id` into one bundle"""
+    path = _snapshot_path(directory, collection_event_id)
+    buffer = io.BytesIO()
+
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as bundle:
+        for root, _, file_names in os.walk(path):
+            for file_name in file_names:
+                file_path = os.path.join(root, file_name)
+                bundle.write(file_path, arcname=os.path.relpath(file_path, path))
+
+    return buffer.getvalue()
+
+
+def unpack_bundle(directory: str, collection_event_id: int, bundle: bytes) -> bool:
+    """
+    Extract a bundle made by `pack_bundle` as the snapshot files of
+    `collection_event_id`.  False if it belongs to another event or format version.
+    """
+    with zipfile.ZipFile(io.BytesIO(bundle)) as bundle_zip:
+        meta = json.loads(bundle_zip.read(META_FILE))
+        if (
+            meta.get("format_version") != FORMAT_VERSION
+            or meta.get("collection_event_id") != collection_event_id
+        ):
+            logger.warning(f"Ignoring snapshot bundle with metadata {meta}")
+            return False
+
+        os.makedirs(directory, exist_ok=True)
+        temp_path = tempfile.mkdtemp(dir=directory, prefix=_BUILDING_PREFIX)
+        try:
+            bundle_zip.extractall(temp_path)
+            _publish(temp_path, directory, collection_event_id)
+        except BaseException:
+            shutil.rmtree(temp_path, ignore_errors=True)
+            raise
+    logger.info(f"Unpacked snapshot bundle of collection event {collection_event_id}")
+
+    return True
+
+
+def remove_other_snapshots(directory: str, keep_collection_event_ids):
+    """
+    Delete the files and build locks of every other snapshot.  Processes still
+    mapping the files keep their pages until they unmap.
+    """
+    keep_paths = set()
+    for collection_event_id in keep_collection_event_ids:
+        keep_paths.add(_snapshot_path(directory, collection_event_id))
+        keep_paths.add(_lock_path(directory, collection_event_id))
+
+    for entry in os.scandir(directory):
+        if entry.name.startswith(_BUILDING_PREFIX) or entry.path in keep_paths:
+            continue
+        if entry.is_dir():
+            shutil.rmtree(entry.path, ignore_errors=True)
+            logger.debug(f"Removed old snapshot files {entry.path}")
+        elif entry.name.endswith(_LOCK_SUFFIX):
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
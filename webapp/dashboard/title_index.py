@@ -0,0 +1,85 @@
+import re
+from bisect import bisect_left
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+_TOKEN = re.compile(r"\w+")
+# Sorts after any other character, to bound the terms starting with a prefix
+_LAST_CHARACTER = chr(0x10FFFF)
+# Weight of a term that only starts with a query token, relative to an exact match
+PREFIX_MATCH_WEIGHT = 0.5
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.casefold())
+
+
+class TitleIndex:
+    """
+    Inverted index over video titles, by position.  Every token of a query must match
+    a title, either as a whole word or as the start of one, so results narrow as a
+    query is typed.  Titles are ranked by the rarity of the words they match, exact
+    words counting more than words that only start with a token.
+    """
+
+    def __init__(self, titles: Iterable[str]):
+        postings: Dict[str, List[int]] = {}
+        count = 0
+        for position, title in enumerate(titles):
+            count += 1
+            for term in set(tokenize(title)):
+                postings.setdefault(term, []).append(position)
+
+        self._size = count
+        # Sorted, so the terms starting with a prefix are one range
+        self._terms = sorted(postings)
+        self._postings = [np.array(postings[term]) for term in self._terms]
+
+    def _matching_terms(self, token: str) -> range:
+        start = bisect_left(self._terms, token)
+        stop = bisect_left(self._terms, token + _LAST_CHARACTER, lo=start)
+        return range(start, stop)
+
+    def _idf(self, count: int) -> float:
+        return np.log((self._size + 1) / count)
+
+    def _scores(self, query: str) -> np.ndarray:
+        tokens = tokenize(query)
+        if not tokens:
+            return np.zeros(0)
+
+        scores = np.zeros(self._size)
+        matched = np.ones(self._size, dtype=bool)
+        for token in set(tokens):
+            terms = self._matching_terms(token)
+            if not terms:
+                return np.zeros(self._size)
+
+            # A prefix weighs as one term of every title it starts a word of, so a
+            # rare word it starts doesn't outrank the word it is
+            prefix_positions = np.unique(
+                np.concatenate([self._postings[term] for term in terms])
+            )
+            token_scores = np.zeros(self._size)
+            token_scores[prefix_positions] = PREFIX_MATCH_WEIGHT * self._idf(
+                len(prefix_positions)
+            )
+            if self._terms[terms.start] == token:
+                exact_positions = self._postings[terms.start]
+                token_scores[exact_positions] = self._idf(len(exact_positions))
+
+            matched[token_scores == 0] = False
+            scores += token_scores
+
+        return np.where(matched, scores, 0)
+
+    def matches(self, query: str) -> np.ndarray:
+        """Positions of the titles matching `query`, in order"""
+        return np.flatnonzero(self._scores(query))
+
+    def ranked(self, query: str) -> np.ndarray:
+        """Positions of the titles matching `query`, best match and latest first"""
+        scores = self._scores(query)
+        positions = np.flatnonzero(scores)
+        return positions[np.lexsort((-positions, -scores[positions]))]
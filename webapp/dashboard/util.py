@@ -1,12 +1,27 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import List
+
 import dash_mantine_components as dmc
 import pandas as pd
 from dash import html
+from plotly.io.json import to_json_plotly
 from log import get_logger
 
 
 logger = get_logger(__name__)
 
 
+def to_plain_json(value):
+    """
+    `value`, such as components or a figure, as the plain JSON structure Dash sends.
+    Cached output in this form is sent without being built or validated again.
+    """
+    return json.loads(to_json_plotly(value))
+
+
 def href_from_id(yt_id: str) -> str:
     return f"https://www.youtube.com/watch?v={yt_id}"
 
@@ -20,40 +35,82 @@ def link_from_id(link_text: str, yt_id: str) -> str:
     )
 
 
-def create_dmc_table(df: pd.DataFrame, spacing: str = "xs"):
+def _format_column(column: pd.Series) -> List[str]:
+    # Same text as `str()` of each value, formatted a column at a time
+    return column.astype(str).tolist()
+
+
+def _html_json(component_type: str, children) -> dict:
+    # What `to_plain_json` makes of an html component, without building one
+    return {
+        "props": {"children": children},
+        "type": component_type,
+        "namespace": "dash_html_components",
+    }
+
+
+def _link_json(link_text: str, yt_id: str, template: dict) -> dict:
+    props = {**template["props"], "children": link_text, "href": href_from_id(yt_id)}
+    return {**template, "props": props}
+
+
+def _render_dmc_table(df: pd.DataFrame, spacing: str) -> dict:
     do_yt_links = "id" in df.columns and "Title" in df.columns
+    columns = [col for col in df.columns.tolist() if col != "id"]
 
-    def convert_row(row):
-        cells = []
-        for col in df.columns.tolist():
-            if col == "id":
-                continue
-            elif col == "Title" and do_yt_links:
-                cells.append(html.Td(link_from_id(link_text=row[col], yt_id=row["id"])))
-            else:
-                cells.append(html.Td(str(row[col])))
-
-        return cells
-
-    table_header = [
-        html.Thead(
-            html.Tr(
-                [
-                    html.Th(col_name)
-                    for col_name in df.columns.tolist()
-                    if col_name != "id"
-                ]
-            )
+    # Cells are built directly in their serialized form, a column at a time
+    cell_columns = []
+    for col in columns:
+        if col == "Title" and do_yt_links:
+            template = to_plain_json(link_from_id(link_text="", yt_id=""))
+            cells = [
+                _link_json(title, yt_id, template)
+                for title, yt_id in zip(df["Title"].tolist(), df["id"].tolist())
+            ]
+        else:
+            cells = _format_column(df[col])
+        cell_columns.append([_html_json("Td", cell) for cell in cells])
+
+    rows = [_html_json("Tr", list(row_cells)) for row_cells in zip(*cell_columns)]
+
+    table_header = [html.Thead(html.Tr([html.Th(col_name) for col_name in columns]))]
+    table = to_plain_json(
+        dmc.Table(
+            table_header,
+            highlightOnHover=True,
+            striped=True,
+            verticalSpacing=spacing,
         )
-    ]
+    )
+    table["props"]["children"].append(_html_json("Tbody", rows))
 
-    rows = [html.Tr(convert_row(row)) for _, row in df.iterrows()]
+    return table
 
-    table_body = [html.Tbody(rows)]
 
-    return dmc.Table(
-        table_header + table_body,
-        highlightOnHover=True,
-        striped=True,
-        verticalSpacing=spacing,
-    )
+_table_cache: OrderedDict = OrderedDict()
+_table_cache_lock = threading.Lock()
+TABLE_CACHE_SIZE = 256
+
+
+def create_dmc_table(df: pd.DataFrame, spacing: str = "xs") -> dict:
+    """
+    A table of `df`, with titles linked to their videos when `df` has their ids.
+    Tables are returned serialized, and kept by a hash of their contents, so an
+    identical table is reused instead of being built again.
+    """
+    digest = hashlib.sha1(
+        pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes()
+    ).hexdigest()
+    key = (digest, tuple(df.columns), spacing)
+    with _table_cache_lock:
+        if key in _table_cache:
+            _table_cache.move_to_end(key)
+            return _table_cache[key]
+
+    table = _render_dmc_table(df, spacing)
+    with _table_cache_lock:
+        _table_cache[key] = table
+        if len(_table_cache) > TABLE_CACHE_SIZE:
+            _table_cache.popitem(last=False)
+
+    return table
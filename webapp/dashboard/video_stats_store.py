@@ -0,0 +1,446 @@
+import threading
+from collections import OrderedDict
+from datetime import date
+from enum import Enum
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .title_index import TitleIndex
+
+PUBLISH_DATE = "Publish Date"
+# Sorts by how well titles match a search
+RELEVANCE = "Relevance"
+
+# Days since the epoch of the Monday that starts each week: 1970-01-01 is a Thursday
+_EPOCH_WEEK_OFFSET = 3
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# Period codes beyond any date, for ranges left open
+_MIN_CODE = np.iinfo(np.int64).min
+_MAX_CODE = np.iinfo(np.int64).max
+
+
+class Frequency(Enum):
+    by_day = "D"
+    by_week = "W"
+    by_month = "M"
+
+
+def _month_code(year: int, month: int) -> int:
+    return (year - 1970) * 12 + month - 1
+
+
+def _day_code(day: date) -> int:
+    return day.toordinal() - _EPOCH_ORDINAL
+
+
+class VideoStatsStore:
+    """
+    Query engine over the latest video stats of a snapshot.
+
+    Videos are kept sorted by publish date, so a row position orders them in time.
+    Positional indexes are built once: the positions of each game, and the day, week
+    and month of each video as codes that never decrease.  A query narrows the
+    positions with binary searches over those indexes and only takes the rows it
+    returns out of the frame.
+    """
+
+    # Columns videos are listed by, sorted once per snapshot
+    PRESORTED_COLUMNS = ["Views", "Likes per 1000 Views", "Comments per 1000 Views"]
+    SELECTION_CACHE_SIZE = 32
+
+    def __init__(self, df_videos: pd.DataFrame):
+        # Snapshot frames are stored in order; sorting here would copy a mapped frame
+        if not df_videos[PUBLISH_DATE].is_monotonic_increasing:
+            df_videos = df_videos.sort_values(
+                by=PUBLISH_DATE, kind="stable", ignore_index=True
+            )
+        self.df = df_videos
+
+        # Codes in wall-clock time, so periods match the dates shown on the pages
+        local_dates = self.df[PUBLISH_DATE].dt.tz_localize(None).to_numpy()
+        days = local_dates.astype("datetime64[D]").astype(np.int64)
+        self._period_codes = {
+            Frequency.by_day: days,
+            Frequency.by_week: (days + _EPOCH_WEEK_OFFSET) // 7,
+            Frequency.by_month: local_dates.astype("datetime64[M]").astype(np.int64),
+        }
+
+        games = self.df["Game"].astype("category")
+        game_codes = np.arange(len(games.cat.categories))
+        by_game = np.argsort(games.cat.codes.to_numpy(), kind="stable")
+        sorted_codes = games.cat.codes.to_numpy()[by_game]
+        starts = np.searchsorted(sorted_codes, game_codes, side="left")
+        stops = np.searchsorted(sorted_codes, game_codes, side="right")
+        self._game_positions: Dict[str, np.ndarray] = {
+            game: by_game[start:stop]
+            for game, start, stop in zip(games.cat.categories, starts, stops)
+            if stop > start
+        }
+
+        self._id_positions = pd.Index(self.df["id"].astype(object))
+        self.titles = TitleIndex(self.df["Title"].astype(object))
+        self._orders: Dict[str, np.ndarray] = {
+            column: np.argsort(self.df[column].to_numpy(), kind="stable")
+            for column in self.PRESORTED_COLUMNS
+        }
+        self._ranks: Dict[str, np.ndarray] = {}
+        self._missing: Dict[str, np.ndarray | None] = {}
+        self._selections: OrderedDict = OrderedDict()
+        self._selections_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    @property
+    def games(self) -> Iterable[str]:
+        return self._game_positions.keys()
+
+    def _period_range(self, frequency: Frequency, start: int, stop: int) -> slice:
+        codes = self._period_codes[frequency]
+        return slice(
+            np.searchsorted(codes, start, side="left"),
+            np.searchsorted(codes, stop, side="left"),
+        )
+
+    def month_range(self, month: date) -> slice:
+        """Positions of the videos published in the month of `month`"""
+        code = _month_code(month.year, month.month)
+        return self._period_range(Frequency.by_month, code, code + 1)
+
+    def date_range(
+        self, published_from: date | None, published_before: date | None
+    ) -> slice:
+        """Positions of the videos published from one day up to another, exclusive"""
+        return self._period_range(
+            Frequency.by_day,
+            _MIN_CODE if published_from is None else _day_code(published_from),
+            _MAX_CODE if published_before is None else _day_code(published_before),
+        )
+
+    def positions(
+        self,
+        games: Iterable[str] | None = None,
+        month: date | None = None,
+        video_ids: Iterable[str] | None = None,
+        published_from: date | None = None,
+        published_before: date | None = None,
+        search: str | None = None,
+    ) -> np.ndarray:
+        """
+        Positions of the videos of any of `games`, published in `month` and in
+        [`published_from`, `published_before`), among `video_ids` and with titles
+        matching `search`, in publish date order.  Filters left as None match every
+        video.
+        """
+        window = self.date_range(published_from, published_before)
+        if month is not None:
+            month_window = self.month_range(month)
+            start = max(window.start, month_window.start)
+            window = slice(start, max(min(window.stop, month_window.stop), start))
+
+        if games is None:
+            positions = np.arange(window.start, window.stop)
+        else:
+            game_positions = []
+            for game in games:
+                candidates = self._game_positions.get(game)
+                if candidates is None:
+                    continue
+                start, stop = np.searchsorted(candidates, [window.start, window.stop])
+                game_positions.append(candidates[start:stop])
+            positions = np.sort(np.concatenate(game_positions or [np.array([], int)]))
+
+        if video_ids is not None:
+            id_positions = self._id_positions.get_indexer(list(video_ids))
+            positions = np.intersect1d(
+                positions, id_positions[id_positions >= 0], assume_unique=True
+            )
+
+        if search is not None:
+            positions = np.intersect1d(
+                positions, self.titles.matches(search), assume_unique=True
+            )
+
+        return positions
+
+    def _order(self, column: str) -> np.ndarray:
+        # Positions of every video sorted by `column`
+        if column not in self._orders:
+            self._orders[column] = np.argsort(self.df[column].to_numpy(), kind="stable")
+
+        return self._orders[column]
+
+    def _rank(self, column: str) -> np.ndarray:
+        # Rank of every video by `column`; built on first use of each sort column
+        if column not in self._ranks:
+            order = self._order(column)
+            rank = np.empty(len(order), dtype=np.int64)
+            rank[order] = np.arange(len(order))
+            self._ranks[column] = rank
+
+        return self._ranks[column]
+
+    def _missing_values(self, column: str) -> np.ndarray | None:
+        # Which videos have no `column` value, or None if all have one
+        if column not in self._missing:
+            missing = self.df[column].isna().to_numpy()
+            self._missing[column] = missing if missing.any() else None
+
+        return self._missing[column]
+
+    def _reverse(self, positions: np.ndarray, column: str) -> np.ndarray:
+        # Descending from ascending `column` order, in which missing values sort
+        # last; they stay last instead of leading
+        missing = self._missing_values(column) if column in self.df.columns else None
+        if missing is None:
+            return positions[::-1]
+
+        is_missing = missing[positions]
+        return np.concatenate([positions[~is_missing][::-1], positions[is_missing]])
+
+    def sort(
+        self, positions: np.ndarray, by: str = PUBLISH_DATE, ascending: bool = True
+    ) -> np.ndarray:
+        """`positions` ordered by the `by` column, videos without a value last"""
+        if by != PUBLISH_DATE:
+            positions = positions[np.argsort(self._rank(by)[positions], kind="stable")]
+
+        return positions if ascending else self._reverse(positions, by)
+
+    def take(self, positions: np.ndarray) -> pd.DataFrame:
+        return self.df.take(positions)
+
+    def query(
+        self,
+        games: Iterable[str] | None = None,
+        month: date | None = None,
+        video_ids: Iterable[str] | None = None,
+        sort_by: str = PUBLISH_DATE,
+        ascending: bool = True,
+        page: int | None = None,
+        page_size: int = 20,
+    ) -> pd.DataFrame:
+        """
+        Videos matching the same filters as `positions`, sorted by `sort_by`.  Only the
+        `page_size` rows of `page` are taken if a page is given.
+        """
+        positions = self.sort(
+            self.positions(games=games, month=month, video_ids=video_ids),
+            by=sort_by,
+            ascending=ascending,
+        )
+        if page is not None:
+            positions = positions[page * page_size : (page + 1) * page_size]
+
+        return self.take(positions)
+
+    def top(self, positions: np.ndarray, by: str) -> pd.Series:
+        """The video with the highest `by` among `positions`"""
+        return self.df.iloc[self.sort(positions, by=by, ascending=False)[0]]
+
+    def sorted_selection(
+        self,
+        games: Tuple[str, ...] | None = None,
+        video_ids: Tuple[str, ...] | None = None,
+        sort_by: str = PUBLISH_DATE,
+        ascending: bool = True,
+        frequency: Frequency | None = None,
+        search: str | None = None,
+    ) -> "SortedSelection":
+        """
+        The videos of any of `games`, among `video_ids` and with titles matching
+        `search`, in `sort_by` order, to be paged through with a cursor.  Sorted by
+        `RELEVANCE`, the best matches of `search` come first, or the newest videos
+        without one.  Pages end on the boundaries of the days, weeks or months of
+        `frequency` if one is given.
+
+        The order comes from the presorted columns or the ranked search instead of
+        sorting the selection, and the last few selections are kept, so each later
+        page is a slice.
+        """
+        key = (games, video_ids, sort_by, ascending, frequency, search)
+        with self._selections_lock:
+            if key in self._selections:
+                self._selections.move_to_end(key)
+                return self._selections[key]
+
+        positions = self.positions(games=games, video_ids=video_ids, search=search)
+        if sort_by == RELEVANCE and search is None:
+            sort_by = PUBLISH_DATE
+        if sort_by != PUBLISH_DATE:
+            if sort_by == RELEVANCE:
+                # Best matches last, as for the other columns listed descending
+                order = self.titles.ranked(search)[::-1]
+            else:
+                order = self._order(sort_by)
+            selected = np.zeros(len(self), dtype=bool)
+            selected[positions] = True
+            positions = order[selected[order]]
+        if not ascending:
+            positions = self._reverse(positions, sort_by)
+
+        bucket_codes = None
+        if frequency is not None:
+            bucket_codes = self._period_codes[frequency][positions]
+        selection = SortedSelection(positions, bucket_codes)
+
+        with self._selections_lock:
+            self._selections[key] = selection
+            if len(self._selections) > self.SELECTION_CACHE_SIZE:
+                self._selections.popitem(last=False)
+
+        return selection
+
+    def buckets(
+        self, positions: np.ndarray, frequency: Frequency
+    ) -> Iterator[Tuple[pd.Timestamp, np.ndarray]]:
+        """
+        Split `positions`, which must be in publish date order, either way, into the
+        days, weeks or months the videos were published in.  Each is labelled with
+        its first day, or with its last day for weeks.  Periods without videos are
+        skipped.
+        """
+        if len(positions) == 0:
+            return
+
+        codes = self._period_codes[frequency][positions]
+        splits = np.flatnonzero(np.diff(codes)) + 1
+        starts = np.concatenate([[0], splits])
+        stops = np.concatenate([splits, [len(positions)]])
+
+        for start, stop in zip(starts, stops):
+            yield self._period_label(frequency, codes[start]), positions[start:stop]
+
+    @staticmethod
+    def _period_label(frequency: Frequency, code: int) -> pd.Timestamp:
+        if frequency == Frequency.by_week:
+            # Weeks run Monday to Sunday, labelled with the Sunday that ends them
+            days = code * 7 - _EPOCH_WEEK_OFFSET + 6
+        elif frequency == Frequency.by_month:
+            return pd.Timestamp(np.datetime64(int(code), "M"))
+        else:
+            days = code
+
+        return pd.Timestamp(np.datetime64(int(days), "D"))
+
+
+class SortedSelection:
+    """
+    Positions of selected videos in the order they are listed.  A cursor is the
+    index of the first video that hasn't been listed yet.
+    """
+
+    def __init__(self, positions: np.ndarray, bucket_codes: np.ndarray | None = None):
+        self.positions = positions
+        # End of every run of videos of the same period, where pages may end
+        self._bucket_stops = None
+        if bucket_codes is not None:
+            self._bucket_stops = np.append(
+                np.flatnonzero(np.diff(bucket_codes)) + 1, len(positions)
+            )
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def page(self, cursor: int, page_size: int) -> Tuple[np.ndarray, int]:
+        """
+        At least `page_size` positions from `cursor`, up to the end of the period of
+        the last one, and the cursor of the next page
+        """
+        stop = min(cursor + page_size, len(self.positions))
+        if self._bucket_stops is not None and stop > cursor:
+            stop = int(self._bucket_stops[np.searchsorted(self._bucket_stops, stop)])
+
+        return self.positions[cursor:stop], stop
+
+
+class VideoStatsCube:
+    """
+    Video count, views, likes and comments per (day, game) and per (month, game),
+    aggregated once per snapshot, with games as plain strings.  Cells are sorted by
+    period, so the cells of a month are found with a binary search instead of
+    grouping its videos again.
+    """
+
+    MEASURES = ["Views", "Likes", "Comments"]
+    FREQUENCIES = [Frequency.by_day, Frequency.by_month]
+
+    def __init__(self, videos: VideoStatsStore):
+        self._cells = {
+            frequency: self._aggregate(videos, frequency)
+            for frequency in self.FREQUENCIES
+        }
+        self._period_codes = {
+            frequency: cells["Period"].to_numpy()
+            for frequency, cells in self._cells.items()
+        }
+        self.df_top_monthly = self._top_monthly()
+
+    @classmethod
+    def _aggregate(cls, videos: VideoStatsStore, frequency: Frequency):
+        df = videos.df[["Game", *cls.MEASURES]].assign(
+            Period=videos._period_codes[frequency]
+        )
+        cells = df.groupby(["Period", "Game"], observed=True).agg(
+            Count=("Game", "size"),
+            **{measure: (measure, "sum") for measure in cls.MEASURES},
+        )
+
+        # Games by name: mapped categories keep the order the games first appeared in
+        return (
+            cells.reset_index()
+            .astype({"Game": str})
+            .sort_values(by=["Period", "Game"], ignore_index=True)
+        )
+
+    def _cells_between(self, frequency: Frequency, start: int, stop: int):
+        codes = self._period_codes[frequency]
+        return self._cells[frequency].iloc[
+            np.searchsorted(codes, start) : np.searchsorted(codes, stop)
+        ]
+
+    def month(self, month: date) -> pd.DataFrame:
+        """Totals per game of the videos published in the month of `month`"""
+        code = _month_code(month.year, month.month)
+        return self._cells_between(Frequency.by_month, code, code + 1).drop(
+            columns="Period"
+        )
+
+    def months(self) -> List[date]:
+        """First day of every month with videos, oldest first"""
+        codes = np.unique(self._period_codes[Frequency.by_month])
+        return codes.astype("datetime64[M]").astype(date).tolist()
+
+    def days_of_month(self, month: date) -> pd.DataFrame:
+        """Totals per day and game of the month of `month`, days as US/Eastern dates"""
+        first_day = date(month.year, month.month, 1)
+        next_month = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+        cells = self._cells_between(
+            Frequency.by_day, _day_code(first_day), _day_code(next_month)
+        )
+        dates = pd.DatetimeIndex(
+            cells["Period"].to_numpy().astype("datetime64[D]")
+        ).tz_localize("US/Eastern")
+
+        return cells.drop(columns="Period").assign(Date=dates)
+
+    def _top_monthly(self) -> pd.DataFrame:
+        # Each month's most published game; ties go to the first game alphabetically
+        cells = self._cells[Frequency.by_month]
+        top_cells = cells.loc[cells.groupby("Period")["Count"].idxmax()]
+        total_videos = cells.groupby("Period")["Count"].sum()
+        months = pd.DatetimeIndex(
+            top_cells["Period"].to_numpy().astype("datetime64[M]")
+        )
+
+        return pd.DataFrame(
+            {
+                "Month": months.strftime("%Y %B"),
+                "Game": top_cells["Game"].to_numpy(),
+                "Game Count": top_cells["Count"].to_numpy(),
+                "Total Videos": total_videos.loc[top_cells["Period"]].to_numpy(),
+            }
+        ).iloc[::-1].reset_index(drop=True)